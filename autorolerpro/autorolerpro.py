@@ -1,20 +1,20 @@
 
 import traceback
-import unicodedata
-import requests
+import asyncio
+import heapq
 import discord
 import math
 
-from .utils import LogManager, LogType, FileManager, FlagType
+from .utils import LogManager, LogType, FileManager, FlagType, HistoryIndex, HistoryArchive, GetExpiredHistory, RollupHistory, PerfRecorder, Game, Member, NameIndex, NameFilter, PlayerIndex, ScoreIndex, ScoreInputs, TrigramIndex, ListSets, SortedViews, RollingPlaytime, UnresolvedNames, IGDBClient, IGDBError, multiquery_size, IGDBCache, SingleFlight, CoverStore, ProcessCover, GetCoverColor
 from .views import AliasView
 
+from collections.abc import MutableMapping
 from datetime import datetime, timedelta
 from redbot.core import commands, bot, app_commands
 from difflib import SequenceMatcher
 from discord.ext import tasks
 from io import BytesIO
 from enum import Enum
-from PIL import Image
 
 # Initializes intents
 intents = discord.Intents(messages=True, guilds=True, members = True, presences = True)
@@ -44,16 +44,145 @@ class NavigationType(Enum):
 
 # Create the log and Files objects
 Files = FileManager("/data/cogs/AutoRolerPro")
-Log   = LogManager(Files.log_file, Files.config['DebugMode'])
+Log   = LogManager(Files.log_file, Files.config['DebugMode'], Files.config['LogMaxSize'], Files.config['LogRotateHours'], Files.config['LogBackupCount'], Files.config['LogCompress'])
+
+# Records latency histograms of the hot paths
+Perf = PerfRecorder()
+
+# Array-backed playtime history, rebuilt per game only after its history changes, backed by the cold archive
+Archive = HistoryArchive(Files.archive_file)
+History = HistoryIndex(Archive, Files.config['HistoryRetentionDays'])
+
+# Running 7, 30, 90 day and all-time playtime totals, built on first use and updated as play sessions end
+Rolling = RollingPlaytime(Archive, Files.config['HistoryRetentionDays'])
+
+# Activity names that failed to resolve to a game, skipped with a growing backoff so they don't cause a lookup and an admin prompt every time
+Unresolved = UnresolvedNames(Files.unresolved_file, Files.config['UnresolvedNameHours'], Files.config['UnresolvedNameBackoff'], Files.config['UnresolvedNameMaxHours'])
+
+# Pooled connection to the IGDB api and the cover image server, so requests don't block the event loop
+IGDB = IGDBClient(Files.config)
+
+# Resolved searches, game lookups and cover urls, so repeated lookups of the same game skip IGDB
+Responses = IGDBCache(Files.igdb_cache_file, Files.config['IGDBCacheHours'], Files.config['IGDBCacheMaxEntries'])
+
+# Cover images ready to attach, so showing the same cover again needs no download or encoding
+Covers = CoverStore(Files.covers_dir, Files.config['CoverCacheMaxSize'])
+
+# Lookups that are in progress, so members starting the same new game at once share a single request
+Resolving = SingleFlight()
+Covering  = SingleFlight()
+
+# Cover downloads that are in progress, keyed by url
+Downloading = SingleFlight()
+
+# Roles that are being created, keyed by game name, so members starting the same new game at once don't each create one
+Creating = SingleFlight()
+
+# Local midnight, when the rolling windows move forward
+midnight = datetime.now().astimezone().replace(hour = 0, minute = 0, second = 0, microsecond = 0).timetz()
+
+# Resolves game and alias names regardless of case, accents and whitespace
+Names = NameIndex()
+Names.Rebuild(Files.games, Files.aliases)
+
+# Drops the cached playtime series of a game whenever the game or its history changes, and keeps its name indexed for resolution and search
+def OnGamesUpdated(path: list):
+    if not path:
+        History.Invalidate()
+        Rolling.Invalidate()
+        Names.RebuildGames(Files.games)
+        GameSearch.Rebuild(Files.games)
+        GameViews.Rebuild()
+        Scores.Invalidate()
+    elif len(path) == 1:
+        History.Invalidate(path[0])
+        if path[0] in Files.games:
+            Names.AddGame(path[0])
+            GameSearch.Add(path[0])
+            GameViews.Add(path[0])
+            Players.AddGame(path[0], Files.members)
+            if Scores.built:
+                Scores.Set(path[0], GetScoreInputs(path[0]))
+        else:
+            Names.RemoveGame(path[0])
+            GameSearch.Remove(path[0])
+            GameViews.Remove(path[0])
+            Players.RemoveGame(path[0])
+            Scores.Remove(path[0])
+            Rolling.Remove(path[0])
+    elif path[1] == 'history':
+        History.Invalidate(path[0])
+        GameViews.UpdatePopularity(path[0])
+    elif path[1] == 'role':
+        Scores.SetRole(path[0], Files.games[path[0]].get('role') is not None)
+    elif path[1] == 'added_datetime':
+        Scores.SetAdded(path[0], GetAddedDatetime(Files.games[path[0]]))
+
+# Keeps the alias names indexed for resolution and search
+def OnAliasesUpdated(path: list):
+    if not path:
+        Names.RebuildAliases(Files.aliases)
+        AliasSearch.Rebuild(Files.aliases)
+        AliasViews.Rebuild()
+    else:
+        Names.SetAlias(path[0], Files.aliases.get(path[0]))
+        if path[0] in Files.aliases:
+            AliasSearch.Add(path[0])
+            AliasViews.Add(path[0])
+        else:
+            AliasSearch.Remove(path[0])
+            AliasViews.Remove(path[0])
+
+# Shortlists the game and alias names similar to a list filter
+GameSearch  = TrigramIndex()
+AliasSearch = TrigramIndex()
+GameSearch.Rebuild(Files.games)
+AliasSearch.Rebuild(Files.aliases)
+
+# Orderings of the game and alias names for each sort type, games are ranked by their playtime over the last 30 days
+GameViews  = SortedViews(Files.games, lambda: GetPlaytimeTotals(Files.games, 30))
+AliasViews = SortedViews(Files.aliases)
+
+# Removes the configured strings from activity names, caching the result of each name
+Filter = NameFilter(Files.config['ActivityNameRules'])
+
+# Reverse indexes of the games each member plays and the members playing each game
+Players = PlayerIndex()
+Players.Rebuild(Files.members)
+
+# Role eviction scores, built on first use and kept up to date as games are played and tracked
+Scores = ScoreIndex()
+
+# Keeps the reverse indexes in sync with changes to a member or to one of their games
+def OnMembersUpdated(path: list):
+    if not path:
+        Players.Rebuild(Files.members)
+        Scores.Invalidate()
+        return
+
+    previous_games = set(Players.GetGames(path[0]))
+    if len(path) >= 3 and path[1] == 'games':
+        Players.UpdateMemberGame(path[0], path[2], Files.members.get(path[0]))
+    else:
+        Players.UpdateMember(path[0], Files.members.get(path[0]))
+
+    # Updates the player count of every game the member started or stopped tracking
+    for game_name in previous_games ^ Players.GetGames(path[0]):
+        Scores.SetPlayers(game_name, Players.GetPlayerCount(game_name))
+
+# Recompiles the activity name filter when its rules change
+def OnConfigUpdated(path: list):
+    Filter.SetRules(Files.config['ActivityNameRules'])
+
+Files.Subscribe(FlagType.Games, OnGamesUpdated)
+Files.Subscribe(FlagType.Aliases, OnAliasesUpdated)
+Files.Subscribe(FlagType.Members, OnMembersUpdated)
+Files.Subscribe(FlagType.Config, OnConfigUpdated)
 
 # Returns a string formatted datetime of now
 def GetDateTime():
     return datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
 
-# Normalizes and strips accents from string
-def StripAccents(s):
-   return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
-
 # Returns a string list of game names
 def GetNames(game_list: list):
     names = []
@@ -74,125 +203,151 @@ def GetRoleMentions(game_list: list):
     # Joins the role mentions together in a string, separating each with a comma
     return f"{', '.join(roles)}"
 
-# Returns the cover art URL for the provided game_id
-def GetCoverUrl(game_id):
-    # Request the cover image urls
-    db_json = requests.post('https://api.igdb.com/v4/covers', **{'headers' : Files.config['IGDBCredentials'], 'data' : f'fields url; limit 1; where animated = false; where game = {game_id};'})
-    results = db_json.json()
+# Returns the cover art URLs of the provided game ids, requesting the covers of up to 100 games at once
+@Perf.Timed("IGDB covers")
+async def GetCoverUrls(game_ids: list) -> dict:
+    game_ids = list(dict.fromkeys(game_ids))
+
+    # Only requests the covers that aren't cached or already being requested
+    urls = {}
+    lookups = []
+    for game_id in game_ids:
+        found, url = Responses.Get('cover', game_id)
+        if found:
+            urls[game_id] = url
+        else:
+            lookups.append(game_id)
 
-    if len(results) > 0:
-        # Formats the cover URL
-        url = f"https:{results[0]['url']}"
-        url = url.replace("t_thumb", "t_cover_big")
+    if lookups:
+        urls.update(await Covering.Run(lookups, RequestCoverUrls))
 
-        return url
-    else:
-        return Files.config['DefaultGameCover']
+    return {game_id: urls.get(game_id) or Files.config['DefaultGameCover'] for game_id in game_ids}
+
+# Requests the cover art URLs of the provided game ids from IGDB, up to 100 games per request, caching the results
+async def RequestCoverUrls(game_ids: list) -> dict:
+    batches = [game_ids[index:index + 100] for index in range(0, len(game_ids), 100)]
+
+    # Request the cover image urls, still images first
+    urls = {}
+    responses = await asyncio.gather(*[IGDB.Query('covers', f"fields game,url,animated; limit 500; where game = ({','.join(str(game_id) for game_id in batch)});") for batch in batches])
+
+    for batch, results in zip(batches, responses):
+        if not isinstance(results, list):
+            Log(results, LogType.ERROR)
+            continue
+
+        for result in sorted(results, key = lambda x:bool(x.get('animated'))):
+            if 'url' in result and result.get('game') not in urls:
+                # Formats the cover URL
+                urls[result['game']] = f"https:{result['url']}".replace("t_thumb", "t_cover_big")
+
+        # Games without a cover are cached too, so they aren't requested again
+        for game_id in batch:
+            Responses.Set('cover', game_id, urls.get(game_id))
+
+    return urls
     
 # Returns a list of image files
+@Perf.Timed()
 async def GetImages(game_list: dict):
-    images = []
-    for game in game_list.values():
-        # Request the http content of the game's cover url
-        if 'cover_url' not in game:
-            url = GetCoverUrl(game['id'])
+    # Looks up every missing cover url at once
+    missing = [game for game in game_list.values() if 'cover_url' not in game]
+    if missing:
+        urls = await GetCoverUrls([game['id'] for game in missing])
+        for game in missing:
+            url = urls[game['id']]
             Files.games[game['name']]['cover_url'] = url
             game['cover_url'] = url
 
-            Files.Update(FlagType.Games, True, f"Added missing cover url to {game['name']}.")
+            Files.Update(FlagType.Games, True, f"Added missing cover url to {game['name']}.", [game['name'], 'cover_url'])
 
-        response = requests.get(game['cover_url'])
-        img = Image.open(BytesIO(response.content))
+    # Gets every game's cover concurrently
+    covers = await asyncio.gather(*[GetCover(game['cover_url']) for game in game_list.values()])
 
+    images = []
+    for game, cover in zip(game_list.values(), covers):
         # Construct safe filename from game name
         filename = "".join(c for c in game['name'] if c.isalpha() or c.isdigit() or c == ' ').rstrip()
-
-        # Convert PIL image to a useable binary image
-        with BytesIO() as image_binary:
-            img.save(image_binary, 'PNG')
-            image_binary.seek(0)
-            images.append(discord.File(fp=image_binary, filename=f"{filename}_cover.png"))
+        images.append(discord.File(fp=BytesIO(cover), filename=f"{filename}_cover.png"))
 
     return images
 
-# Return a list of game sets containing a max of "set_amount" games per set
-def GetListSets(game_list: dict, set_amount: int, list_filter: str = None, sort: SortType = SortType.Alphabetical):
-    if sort == SortType.Alphabetical:
-        # Get a list of keys and sort them
-        listKeys = list(game_list.keys())
-        listKeys.sort()
-
-        # Rebuild game_list using the sorted list of keys
-        game_list = {i: game_list[i] for i in listKeys}
-
-    elif sort == SortType.Popularity:
-        # Get a list of keys sorted by playtime
-        listKeys = list(GetPlaytime(game_list, 30).keys())
-
-        # Rebuild game_list using the sorted list of keys
-        game_list = {i: game_list[i] for i in listKeys}
-
-    elif sort == SortType.RecentlyAdded:
-        listKeys = list(Files.games.keys())
-        listKeys.reverse()
-
-        new_list = {}
-        # Loop through games and rebuild game_list 
-        for game_name in listKeys:
-            if game_name in game_list:
-                new_list[game_name] = Files.games[game_name]
-
-        # Rebuild game_list using the sorted list of keys
-        game_list = new_list
+# Returns the PNG bytes of a cover, only downloading and encoding covers that aren't stored yet
+async def GetCover(url: str) -> bytes:
+    cover = Covers.Get(url)
+    if cover is None:
+        cover, _ = (await Downloading.Run([url], DownloadCovers))[url]
 
+    return cover
 
-    list_sets = []
-    item_count = 0
-    for name, details in game_list.items():
+# Downloads covers once, storing each as a PNG and caching its dominant color, so a later render or color lookup needs no download
+async def DownloadCovers(urls: list) -> dict:
+    async def DownloadCover(url: str) -> tuple:
+        content = await IGDB.Download(url)
 
-        # Check eligability if there's a list_filter
-        if list_filter:
-            list_filter = list_filter.strip().lower()
-            test_name = name.lower()
-            similarity = SequenceMatcher(None, test_name, list_filter).ratio()
-            # Log(f"Similarity Score for {list_filter} and {test_name} is ({similarity}).", LogType.DEBUG)
+        # Decodes, encodes and measures the image off the event loop
+        cover, color = await asyncio.to_thread(ProcessCover, content)
+        Covers.Put(url, cover)
+        Responses.Set('color', url, color)
 
-            # If the list_filter is not in the name and similarity score is below 0.55, skip this game
-            if list_filter not in test_name and similarity < 0.55:
-                # Log(f"Skipping {test_name}!", LogType.DEBUG)
-                continue
-
-        # Get the next index from set_amount
-        idx = math.floor(item_count/set_amount)
-        if idx < len(list_sets):
-            list_sets[idx][name] = details
-        else:
-            list_sets.append({})
-            list_sets[idx][name] = details
+        return cover, color
 
-        # Iterate the number of items counted
-        item_count += 1
+    return dict(zip(urls, await asyncio.gather(*[DownloadCover(url) for url in urls])))
 
-    return list_sets
+# Returns the search index of the games or aliases, or a temporary one for any other list
+def GetSearchIndex(game_list: dict) -> TrigramIndex:
+    if game_list is Files.games:
+        return GameSearch
+    if game_list is Files.aliases:
+        return AliasSearch
 
-# Returns the dominant color of an image
-def GetDominantColor(image_url: str, palette_size: int = 16):
-    response = requests.get(image_url)
-    img = Image.open(BytesIO(response.content))
+    index = TrigramIndex()
+    index.Rebuild(game_list)
+    return index
 
-    # Resize image to speed up processing
-    img.thumbnail((100, 100))
+# Returns the sorted views of the games or aliases, or temporary ones for any other list
+def GetSortedViews(game_list: dict) -> SortedViews:
+    if game_list is Files.games:
+        return GameViews
+    if game_list is Files.aliases:
+        return AliasViews
 
-    # Reduce colors (uses k-means internally)
-    paletted = img.convert('P', palette=Image.Palette.ADAPTIVE, colors=palette_size)
+    return SortedViews(game_list, lambda: GetPlaytime(game_list, 30))
 
-    # Find the color that occurs most often
-    palette = paletted.getpalette()
-    color_counts = sorted(paletted.getcolors(), reverse=True)
-    palette_index = color_counts[0][1]
-    dominant_color = palette[palette_index*3:palette_index*3+3]
+# Return a list of game sets containing a max of "set_amount" games per set
+def GetListSets(game_list: dict, set_amount: int, list_filter: str = None, sort: SortType = SortType.Alphabetical):
+    views = GetSortedViews(game_list)
+    if sort == SortType.Popularity:
+        names = views.GetPopularity()
+    elif sort == SortType.RecentlyAdded:
+        names = views.GetRecentlyAdded()
+    else:
+        names = views.GetAlphabetical()
+
+    # Keeps the names that contain the list_filter or have a similarity score of at least 0.55, out of the ones sharing enough of its trigrams
+    if list_filter:
+        matches = GetSearchIndex(game_list).Search(list_filter)
+        names = [name for name in names if name in matches]
+
+    # Pages are only built when they're displayed
+    return ListSets(names, game_list, set_amount)
+
+# Returns the dominant color of a cover, downloading it only if it isn't stored yet
+# Concurrent requests for the same cover share a single download, which also stores the cover for showing it afterwards
+@Perf.Timed()
+async def GetDominantColor(image_url: str):
+    found, color = Responses.Get('color', image_url)
+    if found:
+        return color
+
+    cover = Covers.Get(image_url)
+    if cover is None:
+        _, color = (await Downloading.Run([image_url], DownloadCovers))[image_url]
+    else:
+        color = await asyncio.to_thread(GetCoverColor, cover)
+        Responses.Set('color', image_url, color)
 
-    return ('%02X%02X%02X' % tuple(dominant_color))
+    return color
 
 # Adds a member to the members list and saves file
 def AddMember(member: discord.Member):
@@ -207,14 +362,14 @@ def AddMember(member: discord.Member):
     member_details['opt_out'] = False
     
     # Adds the member details to the members list
-    Files.members[member_details['name']] = member_details
+    Files.members[member_details['name']] = Member.FromDict(member_details)
 
     # Toggles the updated flag for members
-    Files.Update(FlagType.Members, True, f"Added a new member, {member.name}")
+    Files.Update(FlagType.Members, True, f"Added a new member, {member.name}", [member_details['name']])
 
 # Update first dict with second recursively
 def MergeDictionaries(d1: dict, d2: dict):
-    if isinstance(d1, dict):
+    if isinstance(d1, MutableMapping):
         for k, v in d1.items():
             if k in d2:
                 d2[k] = MergeDictionaries(v, d2[k])
@@ -231,9 +386,12 @@ def UpdateMember(member: discord.Member, new_details: dict):
 
     # Updates specific member with new details using the recursive MergeDictionaries function
     MergeDictionaries(Files.members[member.name], new_details)
+
+    # Converts newly merged game entries to records
+    Files.members[member.name].Coerce()
     
     # Toggles the updated flag for members
-    Files.Update(FlagType.Members, True, f"Updated member information, {member.name}")
+    Files.Update(FlagType.Members, True, f"Updated member information, {member.name}", [member.name])
 
 # Returns a count of how many roles are being used by games
 def GetRoleCount():
@@ -249,24 +407,39 @@ def GetRoleCount():
 
     return count
 
+# Returns the datetime of the last day a game was played, or None if it was never played
+def GetLastPlayedDay(game_name: str):
+    game = Files.games[game_name]
+
+    # Looks up the latest day in the database, since only recent history is held in memory
+    if Files.database:
+        day = Files.database.GetLastPlayed(game_name)
+        if not day:
+            return
+
+        return datetime.strptime(day, '%Y-%m-%d')
+
+    # Skips game if there's not history
+    Files.LoadHistory()
+    if 'history' not in game and 'last_archived' not in game:
+        return
+    
+    # Looks up the most recent day from the game's playtime series
+    last_day = History.GetLastPlayed(game_name, game)
+    if last_day is None:
+        return
+
+    return datetime.fromordinal(last_day)
+
 # Returns the number of days since a game was last played
 def GetLastPlayed(game_name: str):
     if game_name in Files.games:
-        game = Files.games[game_name]
-
-        # Skips game if there's not history
-        if 'history' not in game:
+        last_day = GetLastPlayedDay(game_name)
+        if not last_day:
             return
-        
-        last_played = None
-        for day in game['history'].keys():
-            delta = datetime.now() - datetime.strptime(day, '%Y-%m-%d')
-            days = delta.days + delta.seconds/86400
 
-            if not last_played or last_played > days:
-                last_played = days
-        
-        return last_played
+        delta = datetime.now() - last_day
+        return delta.days + delta.seconds/86400
     else:
         Log(f"Failed to get last played. Could not find {game_name} in list.", LogType.ERROR)
         return False
@@ -274,17 +447,8 @@ def GetLastPlayed(game_name: str):
 # Returns the number of players who play/track a given game
 def GetNumberOfPlayers(game_name: str):
     if game_name in Files.games:
-        count = 0
-        for member in Files.members.values():
-            # Skips member if they don't play the game
-            if 'games' not in member:
-                continue
-
-            # Add 1 to the count if the member plays
-            if game_name in member['games']:
-                count += 1
-        
-        return count
+        # Looks up the count from the reverse index instead of scanning every member
+        return Players.GetPlayerCount(game_name)
     else:
         Log(f"Failed to get last played. Could not find {game_name} in list.", LogType.ERROR)
         return False
@@ -296,35 +460,33 @@ def GetDaysSinceAdded(game_name: str):
             return delta.days + delta.seconds/86400
         else:
             Files.games[game_name]["added_datetime"] = GetDateTime()
+            Files.Update(FlagType.Games, True, f"Added missing 'added_datetime' to {game_name}!", [game_name, 'added_datetime'])
             return 0
     return False
 
-# Scores all games and returns the lowest
-def GetLowestScoringGame(black_list: list):
-    # Initialize the playtime message and game refernces for the games played
-    game_refs = {}
-    for game_name, playtime in GetPlaytime(Files.games).items():
-
-        days_since_added = GetDaysSinceAdded(game_name)
+# Returns when a game was added, or None if it's missing
+def GetAddedDatetime(game: dict):
+    if 'added_datetime' in game:
+        return datetime.strptime(game['added_datetime'], '%Y-%m-%d %H:%M:%S.%f')
 
-        # Skip blacklisted games or games without a role assigned to them
-        if game_name in black_list or Files.games[game_name]["role"] == None or days_since_added <= 1:
-            continue
+# Collects the inputs of a game's score: its all-time playtime, number of players, last played day, added datetime and role
+def GetScoreInputs(game_name: str, playtime: float = None):
+    game = Files.games[game_name]
+    if playtime is None:
+        playtime = GetPlaytime({game_name: game})[game_name]
 
-        # Get number of days since last played, the number of players, and when the game was added
-        last_played = GetLastPlayed(game_name)
-        num_players = GetNumberOfPlayers(game_name)
-        
-        if last_played:
-            score = (num_players + playtime)/last_played
-        else:
-            score = (num_players + playtime)/days_since_added
+    return ScoreInputs(playtime, Players.GetPlayerCount(game_name), GetLastPlayedDay(game_name), GetAddedDatetime(game), game.get('role') is not None)
 
-        # Store a reference of the game data in game_refs
-        game_refs[game_name] = score
+# Scores every game the first time it's needed, after that scores are updated as games are played and tracked
+def GetScores():
+    if not Scores.built:
+        Scores.Build({game_name: GetScoreInputs(game_name, playtime) for game_name, playtime in GetPlaytime(Files.games).items()})
+    return Scores
 
-    # Sort the entire list by highest hours played
-    return sorted(game_refs.items(), key = lambda x:x[1], reverse=False)[0] # Get the first entry with [0]
+# Returns up to count of the lowest scoring games with a role, as a list of (game_name, score)
+@Perf.Timed()
+def GetLowestScoringGames(black_list: list, count: int = 1):
+    return GetScores().GetLowest(count, black_list)
 
 # Finds role in guild - can create one if missing and remove the lowest score game's role if role count is maxed out
 async def GetRole(guild: discord.Guild, game_name: str, create_new: bool = False):
@@ -334,13 +496,22 @@ async def GetRole(guild: discord.Guild, game_name: str, create_new: bool = False
             role: discord.Role = guild.get_role(Files.games[game_name]['role'])
         else:
             Files.games[game_name]["role"] = None
+            Files.Update(FlagType.Games, True, f"Added empty role entry to {game_name}!", [game_name, 'role'])
             role = None
     else:
         Log(f"GetRole: Could not find {game_name} in the database!", LogType.ERROR)
         return None
 
-    # If no role is found and create_new is true, create a new role
+    # If no role is found and create_new is true, create a new role, shared with any caller creating it already
     if not role and create_new:
+        role = (await Creating.Run([game_name], lambda game_names: CreateRoles(guild, game_names)))[game_name]
+
+    return role
+
+# Creates the role of each game, removing the lowest scoring game's role first if role count is maxed out
+async def CreateRoles(guild: discord.Guild, game_names: list) -> dict:
+    roles = {}
+    for game_name in game_names:
         # Loop until role_count is less than the maximum allowed number of roles
         while True:
             role_count = GetRoleCount()
@@ -352,7 +523,12 @@ async def GetRole(guild: discord.Guild, game_name: str, create_new: bool = False
             Log(f"Role count of {role_count} exceeds maximum allowed number of roles ({Files.config['MaxRoleCount']})!")
 
             # Grab the lowest ranking game from the server
-            game, _ = GetLowestScoringGame([game_name])
+            lowest = GetLowestScoringGames([game_name])
+            if not lowest:
+                Log(f"Unable to find a game whose role could be removed!", LogType.ERROR)
+                break
+
+            game, _ = lowest[0]
             lowest_game = Files.games[game]
             Log(f"Lowest scoring game is {game}, which has a role of {lowest_game['role']}")
 
@@ -364,19 +540,22 @@ async def GetRole(guild: discord.Guild, game_name: str, create_new: bool = False
 
             # Removes role ID for this game
             Files.games[game]['role'] = None
+            Files.Update(FlagType.Games, True, f"Removed the role from the {game} game!", [game, 'role'])
             Log(f"Removed role ID ({role_to_remove.id}) from {lowest_game['name']}!")
         
-        # Adds a new role to the server
-        role = await guild.create_role(name = game_name, mentionable = True)
+        # Adds a new role to the server, colored like the game's cover art
+        color = Files.games[game_name].get('color')
+        role = await guild.create_role(name = game_name, mentionable = True, colour = discord.Colour(int(color, 16)) if color else discord.Colour.default())
         Log(f"Created a new role, {game_name}! ID: ({role.id})")
 
         # Stores the role for future use
         Files.games[game_name]['role'] = role.id
 
         # Toggles the updated flag for games
-        Files.Update(FlagType.Games, True, f"Added missing role entry for the {game_name} game!")
+        Files.Update(FlagType.Games, True, f"Added missing role entry for the {game_name} game!", [game_name, 'role'])
+        roles[game_name] = role
 
-    return role
+    return roles
 
 # Removes game from games list and saves to file
 async def RemoveGame(game_name: str, guild: discord.Guild):
@@ -386,17 +565,183 @@ async def RemoveGame(game_name: str, guild: discord.Guild):
         if role:
             await role.delete()
 
+        # Makes sure the history of the removed game isn't restored from the deferred history file
+        Files.LoadHistory()
         del Files.games[game_name]
 
         # Toggles the updated flag for games
-        Files.Update(FlagType.Games, True, f"Removed a game, {game_name}")
+        Files.Update(FlagType.Games, True, f"Removed a game, {game_name}", [game_name])
         
         return True
     else:
         Log(f"Failed to remove game. Could not find {game_name} in list.", LogType.ERROR)
         return False
 
+# Returns the search result that best matches the game name, scored by similarity, release date, rating and dlcs
+def PickTopGame(game_name: str, results: list):
+    # Compares the list of games to the matches, from there score by different features of the game
+    top_game = None
+    top_score = 0
+    for game_candidate in results:
+        # Skip comparing to self
+        if top_game and top_game['name'] == game_candidate['name']:
+            continue
+
+        score = 0
+        # if top_game:
+        #     Log(f"Comparing {game_candidate['name']} with {top_game['name']}!", LogType.DEBUG)
+        # else:
+        #     Log(f"Comparing {game_candidate['name']} with nothing to start scoring!", LogType.DEBUG)
+
+        # Add similarity ratio to score with added weight          
+        
+        candidate_similarity = SequenceMatcher(None, game_name.lower(), str(game_candidate['name']).lower()).ratio()
+
+        if candidate_similarity:
+            score += ((candidate_similarity**2) * 10)
+            # Log(f"{game_candidate['name']} started off with {score} points for similarity to original search of {game_name}!", LogType.DEBUG)
+
+        # Compare release dates, favor newer games
+        top_game_year = None
+        candidate_year = None
+        if top_game and 'first_release_date' in top_game:
+            top_game_year = datetime.utcfromtimestamp(top_game['first_release_date']).strftime('%Y')
+        if 'first_release_date' in game_candidate:
+            candidate_year = datetime.utcfromtimestamp(game_candidate['first_release_date']).strftime('%Y')
+            score += 1
+        
+        if top_game_year and candidate_year:
+            if candidate_year > top_game_year:
+                score += 1
+                # Log(f"{game_candidate['name']} added a point for newer release date, now at {score}, compared to {top_game['name']}'s {top_score}!", LogType.DEBUG)
+            else:
+                score -= 1
+
+        # Compare aggregated ratings, favor higher ratings
+        top_rating = None
+        candidate_rating = None
+        if top_game and 'aggregated_rating' in top_game:
+            top_rating = top_game['aggregated_rating']
+        if 'aggregated_rating' in game_candidate:
+            candidate_rating = game_candidate['aggregated_rating']
+            score += 1
+
+        if top_rating and candidate_rating:
+            if candidate_rating > top_rating:
+                score += 1
+                # Log(f"{game_candidate['name']} added a point for higher rating, now at {score}, compared to {top_game['name']}'s {top_score}!", LogType.DEBUG)
+            else:
+                score -= 1
+
+        # Compare dlcs, favor higher number of dlcs
+        top_dlcs = None
+        candidate_dlcs = None
+        if top_game and 'dlcs' in top_game:
+            top_dlcs = top_game['dlcs']
+        if 'dlcs' in game_candidate:
+            candidate_dlcs = game_candidate['dlcs']
+            score += 1
+
+        if top_dlcs and candidate_dlcs:
+            if len(top_dlcs) > len(candidate_dlcs):
+                score += 1
+                # Log(f"{game_candidate['name']} added a point for more dlcs, now at {score}, compared to {top_game['name']}'s {top_score}!", LogType.DEBUG)
+            else:
+                score -= 1
+
+        # Compare new score with top score and set candidate as top game if higher
+        if score > top_score:
+            # if top_game:
+            #     Log(f"{game_candidate['name']} is a more likely candidate with a score of {score} compared to {top_game['name']}'s {top_score}!", LogType.DEBUG)
+            # else:
+            #     Log(f"{game_candidate['name']} is the first candidate with a score of {score}!", LogType.DEBUG)
+
+            top_score = score
+            top_game = game_candidate
+        # else:
+        #     Log(f"{game_candidate['name']} did not collect enough points with a score of {score} to replace {top_game['name']} with a score of {top_score}!", LogType.DEBUG)
+
+    return top_game
+
+# Returns the IGDB query of a game name, or of a game id if the name is numeric
+def GetGameQuery(game_name: str) -> str:
+    fields = "fields name,summary,first_release_date,aggregated_rating,dlcs;"
+
+    # Filters out titles with the 42 ('erotic') theme unless they're allowed in the config
+    themes = "" if Files.config['AllowEroticTitles'] else " & themes != (42)"
+
+    if game_name.isnumeric(): #TODO: Need a better way of determing if name is actually an ID
+        return f"{fields} limit 1; where id = {int(game_name)}{themes};"
+
+    search = game_name.replace('"', '\\"')
+    return f'search "{search}"; {fields} limit 500; where summary != null{themes};'
+
+# Searches IGDB for every game name, sending the names in batches through the multiquery endpoint
+# Batches run concurrently, bounded by the client's connection limit
+@Perf.Timed("IGDB games")
+async def SearchGames(game_names: list) -> dict:
+    game_names = list(dict.fromkeys(game_names))
+    batches = [game_names[index:index + multiquery_size] for index in range(0, len(game_names), multiquery_size)]
+
+    responses = await asyncio.gather(*[IGDB.MultiQuery({str(index): ('games', GetGameQuery(game_name)) for index, game_name in enumerate(batch)}) for batch in batches])
+
+    results = {}
+    for batch, response in zip(batches, responses):
+        for index, game_name in enumerate(batch):
+            results[game_name] = response.get(str(index), [])
+    return results
+
+# Resolves every game name to its best matching IGDB game, or None if nothing matched
+# Only the picked game is cached rather than every search result, since picking it only depends on the name and the results
+async def ResolveGames(game_names: list) -> dict:
+    erotic = Files.config['AllowEroticTitles']
+
+    resolved = {}
+    lookups  = []
+    for game_name in dict.fromkeys(game_names):
+        found, top_game = Responses.Get(GetQueryKind(game_name), game_name, erotic)
+        if found:
+            resolved[game_name] = top_game
+        else:
+            lookups.append(game_name)
+
+    # Names that normalize to the same query share a lookup with any caller already resolving it
+    if lookups:
+        resolved.update(await Resolving.Run(lookups, RequestGames, lambda game_name: Responses.GetKey(GetQueryKind(game_name), game_name, erotic)))
+
+    # Returns copies, since the returned games are changed as they're added and may be shared between callers
+    return {game_name: dict(top_game) if top_game else None for game_name, top_game in resolved.items()}
+
+# Returns the kind of IGDB query a game name results in
+def GetQueryKind(game_name: str) -> str:
+    return 'game' if game_name.isnumeric() else 'search'
+
+# Searches IGDB for the provided game names and picks the best match of each, caching the results
+async def RequestGames(game_names: list) -> dict:
+    erotic = Files.config['AllowEroticTitles']
+
+    top_games = {}
+    search_results = await SearchGames(game_names)
+    for game_name in game_names:
+        results = search_results.get(game_name, [])
+        if len(results) > 0 and 'cause' in results[0]:
+            # Errors aren't cached, so the next attempt asks again
+            Log(f"No Results Found for {game_name}: {str(results)}", LogType.WARNING)
+            continue
+        elif len(results) == 0:
+            Log(f"No Results Found for {game_name}: {str(results)}", LogType.WARNING)
+            top_game = None
+        else:
+            Log(str(results), LogType.DEBUG)
+            top_game = PickTopGame(game_name, results)
+
+        Responses.Set(GetQueryKind(game_name), game_name, top_game, erotic)
+        top_games[game_name] = top_game
+
+    return top_games
+
 # Adds a list of games to the games list after verifying they are real games
+@Perf.Timed()
 async def AddGames(guild: discord.Guild, game_list: list):
     new_games      = {}
     already_exists = {}
@@ -412,50 +757,36 @@ async def AddGames(guild: discord.Guild, game_list: list):
         # Claims already existing game
         already_exists[actual_name] = Files.games[actual_name]
 
-    # Loops through the provided list of game names
+        # Stops skipping the name, in case it failed to resolve before the game was added
+        Unresolved.Clear(game_name)
+
+    # Loops through the provided list of game names, collecting the ones that have to be looked up
+    lookups = []
     for game_name in game_list:
 
         # Checks if game already exists to avoid unnecessary API calls
         if game_name in Files.games or game_name in Files.aliases:
             AlreadyExists(game_name)
-
-            # Move onto the next game
-            continue
         else:
             # Try a case-insensitive search next
-            try:
-                game_name = [game for game in Files.games if game.lower() == game_name.lower()][0]
-                AlreadyExists(game_name)
-
-                # Move onto the next game
-                continue
-            except:
-                Log(f"Could not find {game_name} in the game list or aliases! Must be a new game!")
-
-        # Check if erotic titles are allowed in the config
-        if Files.config['AllowEroticTitles']:
-            if game_name.isnumeric(): #TODO: Need a better way of determing if name is actually an ID
-                # Request the game title with the provided game id
-                Log(f"Looking for game id {game_name}", LogType.DEBUG)
-                db_json = requests.post('https://api.igdb.com/v4/games', **{'headers' : Files.config['IGDBCredentials'], 'data' : f'fields name,summary,first_release_date,aggregated_rating,dlcs; limit 1; where id = {int(game_name)};'})
-            else:
-                # Request all game titles that match the game name
-                db_json = requests.post('https://api.igdb.com/v4/games', **{'headers' : Files.config['IGDBCredentials'], 'data' : f'search "{game_name}"; fields name,summary,first_release_date,aggregated_rating,dlcs; limit 500; where summary != null;'})
-        else:
-            if game_name.isnumeric():
-                # Request the game title with the provided game id
-                Log(f"Looking for game id {game_name}", LogType.DEBUG)
-                db_json = requests.post('https://api.igdb.com/v4/games', **{'headers' : Files.config['IGDBCredentials'], 'data' : f'fields name,summary,first_release_date,aggregated_rating,dlcs; limit 1; where id = {int(game_name)} & themes != (42);'})
+            resolved_name = Names.Resolve(game_name)
+            if resolved_name in Files.games:
+                AlreadyExists(resolved_name)
             else:
-                # Request all game titles that match the game name while filtering out titles with the 42 ('erotic') theme.
-                db_json = requests.post('https://api.igdb.com/v4/games', **{'headers' : Files.config['IGDBCredentials'], 'data' : f'search "{game_name}"; fields name,summary,first_release_date,aggregated_rating,dlcs; limit 500; where summary != null & themes != (42);'})
+                Log(f"Could not find {game_name} in the game list or aliases! Must be a new game!")
+                lookups.append(game_name)
 
-        # Converts the json database response to a usable dictionary results variable
-        results = db_json.json()
+    if not lookups:
+        return new_games, already_exists, failed_to_find
 
-        if 'message' in results and 'Authorization Failure' in results['message']:
+    # Searches for every new game at once
+    try:
+        resolved = await ResolveGames(lookups)
+    except IGDBError as error:
+        # TODO: Check for active IGDBCredentials and notify admin if it needs updating
+        if error.IsAuthorizationFailure():
             Log(f"Authorization failure, please update authorization key!", LogType.ERROR)
-            Log(results, LogType.ERROR)
+            Log(error.response, LogType.ERROR)
 
             # Get the admin channel and send warning
             admin_channel = guild.get_channel(Files.config['ChannelIDs']['Admin'])
@@ -463,135 +794,64 @@ async def AddGames(guild: discord.Guild, game_list: list):
 
             return None, None, None
 
-        # TODO: Check for active IGDBCredentials and notify admin if it needs updating
-        # Exits if 'cause' exists in results, this is indicative of an error
-        try:
-            if len(results) == 0 or (len(results) > 0 and 'cause' in results[0]):
-                Log(f"No Results Found for {game_name}: {str(results)}", LogType.WARNING)
-                failed_to_find[game_name] = {'name' : game_name, 'summary' : 'unknown', 'first_release_date' : 'unknown'}
-                continue
-            else:
-                Log(str(results), LogType.DEBUG)
-        except:
-            Log(results, LogType.ERROR)
-            Log(f"Error when parsing results for new game!", LogType.ERROR)
-
-        # Compares the list of games to the matches, from there score by different features of the game
-        top_game = None
-        top_score = 0
-        for game_candidate in results:
-            # Skip comparing to self
-            if top_game and top_game['name'] == game_candidate['name']:
-                continue
+        Log(error.response, LogType.ERROR)
+        Log(f"Error when searching for new games!", LogType.ERROR)
+        resolved = {}
 
-            score = 0
-            # if top_game:
-            #     Log(f"Comparing {game_candidate['name']} with {top_game['name']}!", LogType.DEBUG)
-            # else:
-            #     Log(f"Comparing {game_candidate['name']} with nothing to start scoring!", LogType.DEBUG)
-
-            # Add similarity ratio to score with added weight          
-            
-            candidate_similarity = SequenceMatcher(None, game_name.lower(), str(game_candidate['name']).lower()).ratio()
-
-            if candidate_similarity:
-                score += ((candidate_similarity**2) * 10)
-                # Log(f"{game_candidate['name']} started off with {score} points for similarity to original search of {game_name}!", LogType.DEBUG)
-
-            # Compare release dates, favor newer games
-            top_game_year = None
-            candidate_year = None
-            if top_game and 'first_release_date' in top_game:
-                top_game_year = datetime.utcfromtimestamp(top_game['first_release_date']).strftime('%Y')
-            if 'first_release_date' in game_candidate:
-                candidate_year = datetime.utcfromtimestamp(game_candidate['first_release_date']).strftime('%Y')
-                score += 1
-            
-            if top_game_year and candidate_year:
-                if candidate_year > top_game_year:
-                    score += 1
-                    # Log(f"{game_candidate['name']} added a point for newer release date, now at {score}, compared to {top_game['name']}'s {top_score}!", LogType.DEBUG)
-                else:
-                    score -= 1
-
-            # Compare aggregated ratings, favor higher ratings
-            top_rating = None
-            candidate_rating = None
-            if top_game and 'aggregated_rating' in top_game:
-                top_rating = top_game['aggregated_rating']
-            if 'aggregated_rating' in game_candidate:
-                candidate_rating = game_candidate['aggregated_rating']
-                score += 1
-
-            if top_rating and candidate_rating:
-                if candidate_rating > top_rating:
-                    score += 1
-                    # Log(f"{game_candidate['name']} added a point for higher rating, now at {score}, compared to {top_game['name']}'s {top_score}!", LogType.DEBUG)
-                else:
-                    score -= 1
-    
-            # Compare dlcs, favor higher number of dlcs
-            top_dlcs = None
-            candidate_dlcs = None
-            if top_game and 'dlcs' in top_game:
-                top_dlcs = top_game['dlcs']
-            if 'dlcs' in game_candidate:
-                candidate_dlcs = game_candidate['dlcs']
-                score += 1
+    # Collects the best match of each game name
+    top_games = {}
+    for game_name in lookups:
+        top_game = resolved.get(game_name)
+        if top_game:
+            top_games[game_name] = top_game
+        else:
+            failed_to_find[game_name] = {'name' : game_name, 'summary' : 'unknown', 'first_release_date' : 'unknown'}
 
-            if top_dlcs and candidate_dlcs:
-                if len(top_dlcs) > len(candidate_dlcs):
-                    score += 1
-                    # Log(f"{game_candidate['name']} added a point for more dlcs, now at {score}, compared to {top_game['name']}'s {top_score}!", LogType.DEBUG)
-                else:
-                    score -= 1
+    # Gets the cover urls of every game that isn't known yet in a single request, followed by the dominant color of each cover
+    unknown_games = list({top_game['id']: top_game for top_game in top_games.values() if top_game['name'] not in Files.games and top_game['name'] not in Files.aliases}.values())
+    urls = await GetCoverUrls([top_game['id'] for top_game in unknown_games]) if unknown_games else {}
+    colors = dict(zip(urls.keys(), await asyncio.gather(*[GetDominantColor(url) for url in urls.values()], return_exceptions = True)))
 
-            # Compare new score with top score and set candidate as top game if higher
-            if score > top_score:
-                # if top_game:
-                #     Log(f"{game_candidate['name']} is a more likely candidate with a score of {score} compared to {top_game['name']}'s {top_score}!", LogType.DEBUG)
-                # else:
-                #     Log(f"{game_candidate['name']} is the first candidate with a score of {score}!", LogType.DEBUG)
+    # A cover that couldn't be downloaded or decoded only costs its game the color, which clean_db can fill in later
+    for game_id, color in colors.items():
+        if isinstance(color, Exception):
+            Log(f"Unable to get the dominant color of the cover at {urls[game_id]}: {color}", LogType.WARNING)
+            colors[game_id] = None
 
-                top_score = score
-                top_game = game_candidate
-            # else:
-            #     Log(f"{game_candidate['name']} did not collect enough points with a score of {score} to replace {top_game['name']} with a score of {top_score}!", LogType.DEBUG)
+    for game_name, top_game in top_games.items():
+        # The looked up name resolved, so it's no longer skipped
+        Unresolved.Clear(game_name)
 
         # Checks if game already exists again with the nearly found game name
-        if top_game and (top_game['name'] in Files.games or top_game['name'] in Files.aliases):
+        if top_game['name'] in Files.games or top_game['name'] in Files.aliases:
             AlreadyExists(top_game['name'])
-        elif top_game:
-            # Get cover url from game id
-            url = GetCoverUrl(top_game["id"])
-
+        else:
             # Stores the formatted URL in the latest game dictionary
-            top_game['cover_url'] = url
+            top_game['cover_url'] = urls[top_game['id']]
             
-            # Create the Role and give it the dominant color of the cover art
-            color = GetDominantColor(url)
+            # Stores the dominant color of the cover art, which the role is created with
+            top_game['color'] = colors[top_game['id']]
             # TODO: Shift this color towards middle tones
 
             # Stores the datetime that the game was added to the database
             top_game['added_datetime'] = GetDateTime()
 
+            # Keeps only the fields of the game schema
+            top_game = Game.FromDict(top_game)
+
             # Adds the latest_game to the new_games list to return
             new_games[top_game['name']] = top_game
 
             # Add game to game list and saves file
             Files.games[top_game['name']] = top_game
+            Unresolved.Clear(top_game['name'])
             
             role: discord.Role = await GetRole(guild, top_game['name'], True)
             if role:
-                # Edits the role color to match the dominant color
-                await role.edit(colour = discord.Colour(int(color, 16)))
-
                 # Toggles the updated flag for games
-                Files.Update(FlagType.Games, True, f"Added new game, {top_game['name']}, and it's associated role to the server!")
+                Files.Update(FlagType.Games, True, f"Added new game, {top_game['name']}, and it's associated role to the server!", [top_game['name']])
             else:
                 Log(f"Failed to add new game, {top_game['name']}! Could not create a new role!", LogType.ERROR)
-        else:
-            failed_to_find[game_name] = {'name' : game_name, 'summary' : 'unknown', 'first_release_date' : 'unknown'}
         
     return new_games, already_exists, failed_to_find
 
@@ -605,7 +865,7 @@ async def AddAlias(bot: discord.Client, guild: discord.Guild, alias: str, member
     
     # Send the alias message
     original_message = f"{member.mention} started playing `{alias}`, but I can't find it in the database!\n*Please reply with the full name associated with this game!*"
-    view = AliasView(original_message, alias)
+    view = AliasView(original_message, alias, Unresolved)
     view.message = await admin_channel.send(original_message, view = view)
     view.Log = Log
     
@@ -649,9 +909,10 @@ async def AddAlias(bot: discord.Client, guild: discord.Guild, alias: str, member
     if game:
         # Assign game to the new alias
         Files.aliases[alias] = game['name']
+        Unresolved.Clear(alias)
 
         # Toggles the updated flag for aliases
-        Files.Update(FlagType.Aliases, True, f"Assigned a new alias, {alias}, to the {game['name']} game!")
+        Files.Update(FlagType.Aliases, True, f"Assigned a new alias, {alias}, to the {game['name']} game!", [alias])
 
         # Once a game is found, it sets the alias and exits
         await msg.reply(f"Thanks, {msg.author.mention}! I've given <@&{game['role']}> an alias of `{alias}`.", files = await GetImages({game['name'] : game}))
@@ -664,7 +925,7 @@ def RemoveAlias(alias_name: str):
         del Files.aliases[alias_name]
 
         # Toggles the updated flag for aliases
-        Files.Update(FlagType.Aliases, True, f"Removed the {alias_name} alias.")
+        Files.Update(FlagType.Aliases, True, f"Removed the {alias_name} alias.", [alias_name])
 
         return True 
     else:
@@ -672,81 +933,87 @@ def RemoveAlias(alias_name: str):
 
 # Handles tracking of gameplay when someone starts playing
 def StartPlayingGame(member: discord.Member, game_name: str):
-    # Checks of game_name is an alias; if not and game_name is also not in games, return and log failure
-    if game_name in Files.aliases:
-        game_name = Files.aliases[game_name]
-    else:
-        try:
-            game_name = [game for game in Files.games if game.lower() == game_name.lower()][0]
-        except:
-            Log(f"Could not find {game_name} in the game list or aliases when {member.name} started playing!", LogType.WARNING)
-            return
+    # Resolves game_name from the games and aliases; if it can't be found, return and log failure
+    resolved_name = Names.Resolve(game_name)
+    if resolved_name not in Files.games:
+        Log(f"Could not find {game_name} in the game list or aliases when {member.name} started playing!", LogType.WARNING)
+        return
+    game_name = resolved_name
             
     # Grabs the current YYYY-MM-DD from the current datetime
     date = datetime.now().strftime('%Y-%m-%d')
 
+    # Reads the deferred history before changing it
+    Files.LoadHistory()
+
     # Constructs history dictionary for game if missing
-    if 'history' not in Files.games[game_name]:
-        Files.games[game_name]['history'] = {}
+    game = Files.games[game_name]
+    if 'history' not in game:
+        game.history = {}
+    history = game.history
     
     # Adds the current date to the game's history if missing
-    if date not in Files.games[game_name]['history']:
-        Files.games[game_name]['history'][date] = {}
+    if date not in history:
+        history[date] = {}
 
     # Adds the member to the current date if missing
-    if member.name not in Files.games[game_name]['history'][date]:
-        Files.games[game_name]['history'][date][member.name] = {}
+    if member.name not in history[date]:
+        history[date][member.name] = {}
     
     # Sets the member's last_played datetime for the current day and game
-    Files.games[game_name]['history'][date][member.name]['last_played'] = GetDateTime()
+    history[date][member.name]['last_played'] = GetDateTime()
+    Scores.SetLastPlayed(game_name, datetime.strptime(date, '%Y-%m-%d'))
 
     # Toggles the updated flag for games
-    Files.Update(FlagType.Games, True, f"{member.name} started playing {game_name}")
+    Files.Update(FlagType.Games, True, f"{member.name} started playing {game_name}", [game_name, 'history', date, member.name])
 
 # Records number of hours played since member started playing game and tallies for the day
 def StopPlayingGame(member: discord.Member, game_name: str):
-    # Checks if game_name is an alias; if not and game_name is also not in games, return and log failure
-    if game_name in Files.aliases:
-        game_name = Files.aliases[game_name]
-    else:
-        try:
-            game_name = [game for game in Files.games if game.lower() == game_name.lower()][0]
-        except:
-            Log(f"Could not find {game_name} in the game list or aliases when {member.name} stopped playing!", LogType.WARNING)
-            return
+    # Resolves game_name from the games and aliases; if it can't be found, return and log failure
+    resolved_name = Names.Resolve(game_name)
+    if resolved_name not in Files.games:
+        Log(f"Could not find {game_name} in the game list or aliases when {member.name} stopped playing!", LogType.WARNING)
+        return
+    game_name = resolved_name
 
     # Checks if game has history, log error if missing
+    Files.LoadHistory()
     if 'history' not in Files.games[game_name]:
         Log(f"Could not find history for {game_name} after {member.name} stopped playing!", LogType.WARNING)
         return
+    history = Files.games[game_name].history
     
     def AddPlaytime(date, hours):
+        entry = history[date][member.name]
+
         # Adds playtime to the current date and member if missing
-        if 'playtime' not in Files.games[game_name]['history'][date][member.name]:
-            Files.games[game_name]['history'][date][member.name]['playtime'] = 0
+        if 'playtime' not in entry:
+            entry['playtime'] = 0
 
         # Add hours to playtime for the day
-        Files.games[game_name]['history'][date][member.name]['playtime'] = round(Files.games[game_name]['history'][date][member.name]['playtime'] + hours, 2)
+        entry['playtime'] = round(entry['playtime'] + hours, 2)
+        Scores.AddPlaytime(game_name, hours, datetime.strptime(date, '%Y-%m-%d'))
+        Rolling.AddPlaytime(game_name, member.name, datetime.strptime(date, '%Y-%m-%d').toordinal(), hours)
 
         # Remove last_played when it's accounted for
-        if 'last_played' in Files.games[game_name]['history'][date][member.name]:
-            del Files.games[game_name]['history'][date][member.name]['last_played']
+        if 'last_played' in entry:
+            del entry['last_played']
 
         # Toggles the updated flag for games
-        Files.Update(FlagType.Games, True, f"{member.name} stopped playing {game_name}")
+        Files.Update(FlagType.Games, True, f"{member.name} stopped playing {game_name}", [game_name, 'history', date, member.name])
     
     # Grabs today and yesterday's YYYY-MM-DD from the current datetime
     today     = datetime.now().strftime('%Y-%m-%d')
     yesterday = (datetime.now() - timedelta(days = 1)).strftime('%Y-%m-%d')
 
-    if today in Files.games[game_name]['history']:
+    if today in history:
         # Verifies that member has history for today, logs error if not
-        if member.name not in Files.games[game_name]['history'][today]:
+        if member.name not in history[today]:
             Log(f"Could not find member in history for {game_name} after {member.name} stopped playing!", LogType.WARNING)
             return
         
         # Get the difference in time between last_played and now
-        last_played = Files.games[game_name]['history'][today][member.name]['last_played']
+        last_played = history[today][member.name]['last_played']
         delta_time = datetime.now() - datetime.strptime(last_played, '%Y-%m-%d %H:%M:%S.%f')
 
         # Convert delta_time to hours and round to 2 decimal places
@@ -756,11 +1023,11 @@ def StopPlayingGame(member: discord.Member, game_name: str):
         AddPlaytime(today, hours)
     else:
         # Check if there's a last_played in yesterday's history
-        if yesterday in Files.games[game_name]['history'] and member.name in Files.games[game_name]['history'][yesterday] and 'last_played' in Files.games[game_name]['history'][yesterday][member.name]:
+        if yesterday in history and member.name in history[yesterday] and 'last_played' in history[yesterday][member.name]:
             Log(f"{member.name} played {game_name} overnight, splitting time across two days!")
 
             # Get yesterday's last_played time and midnight
-            last_played  = Files.games[game_name]['history'][yesterday][member.name]['last_played']
+            last_played  = history[yesterday][member.name]['last_played']
             midnight = (datetime.strptime(last_played, '%Y-%m-%d %H:%M:%S.%f') + timedelta(days=1)).replace(hour=0, minute=0, microsecond=0, second=0)
             
             # Convert delta_time to hours and round to 2 decimal places
@@ -775,12 +1042,12 @@ def StopPlayingGame(member: discord.Member, game_name: str):
             hours = round(delta_time.total_seconds()/3600, 2)
 
             # Adds the current date to the game's history if missing
-            if today not in Files.games[game_name]['history']:
-                Files.games[game_name]['history'][today] = {}
+            if today not in history:
+                history[today] = {}
 
             # Adds the member to the current date if missing
-            if member.name not in Files.games[game_name]['history'][today]:
-                Files.games[game_name]['history'][today][member.name] = {}
+            if member.name not in history[today]:
+                history[today][member.name] = {}
 
             # Add playtime for today
             AddPlaytime(today, hours)
@@ -788,36 +1055,50 @@ def StopPlayingGame(member: discord.Member, game_name: str):
             Log(f"Could not determine {member.name}'s play session for {game_name}! Maybe it spanned more than 2 days?", LogType.WARNING)
 
             # Loop through all of the dates in the game's history
-            for date in Files.games[game_name]['history']: 
-                if member.name in Files.games[game_name]['history'][date] and 'last_played' in Files.games[game_name]['history'][date][member.name]:
+            for date in history: 
+                if member.name in history[date] and 'last_played' in history[date][member.name]:
                     # Log the last_played and then delete the entry
-                    Log(f"Found {member.name}'s last_played datetime for {game_name}: {Files.games[game_name]['history'][date][member.name]['last_played']}")
-                    del Files.games[game_name]['history'][date][member.name]['last_played']
+                    Log(f"Found {member.name}'s last_played datetime for {game_name}: {history[date][member.name]['last_played']}")
+                    del history[date][member.name]['last_played']
 
                     # Toggles the updated flag for games
-                    Files.Update(FlagType.Games, True, f"Removed {member.name}'s old play history from {game_name}.")
+                    Files.Update(FlagType.Games, True, f"Removed {member.name}'s old play history from {game_name}.", [game_name, 'history', date, member.name])
+
+# Returns the unrounded playtime per game over the last number of given days, which may include games outside of game_records
+def GetPlaytimeTotals(game_records: dict, days: int = None, member_name: str = None) -> dict:
+    # Sums the playtime with a range query, since only recent history is held in memory
+    if Files.database:
+        return Files.database.GetPlaytime(days, member_name)
+
+    Files.LoadHistory()
+    if Rolling.Supports(days):
+        # Looks up the running totals of the window
+        if not Rolling.built:
+            Rolling.Build(Files.games)
+        return Rolling.GetPlaytime(days, member_name)
+
+    # Sums the playtime of every game's series with vectorized window sums
+    return History.GetPlaytime(game_records, days, member_name)
+
+# Returns the count games with the most playtime over the last number of given days, leaving out games without any playtime
+@Perf.Timed()
+def GetTopGames(days: int = None, count: int = 5, member: discord.Member = None) -> dict:
+    totals = GetPlaytimeTotals(Files.games, days, member.name if member else None)
+
+    # Selects the top games with a bounded heap instead of sorting every game
+    top_games = heapq.nlargest(count, ((game_name, playtime) for game_name, playtime in totals.items() if playtime > 0 and game_name in Files.games), key = lambda x:x[1])
+    return {game_name: round(playtime, 2) for game_name, playtime in top_games}
 
 # Gets the total playtime over the last number of given days. Include optional member to filter
 def GetPlaytime(game_list: dict, days: int = None, count: int = None, member: discord.Member = None):
-    top_games = {}
-    for game_name, game_value in game_list.items():
-        # Initializes the gameplay dictionary with zeros for each game
-        top_games[game_name] = 0
+    # Only actual game records have playtime
+    game_records = {name: game for name, game in game_list.items() if Files.games.get(name) is game}
+    totals = GetPlaytimeTotals(game_records, days, member.name if member else None)
 
-        # Skips game if there's not history
-        if 'history' not in game_value:
-            continue
-        
-        for day, day_value in game_value['history'].items():
-            # Checks if day is within the number of days specified
-            if not days or datetime.strptime(day, '%Y-%m-%d') > datetime.now() - timedelta(days = days):
-                for name, details in day_value.items():
-                    # If member is provided, filter by their name
-                    if (member == None or name == member.name) and 'playtime' in details:
-                        top_games[game_name] += details['playtime']
-        
-        # Rounds the game playtime to 2 decimal places
-        top_games[game_name] = round(top_games[game_name], 2)
+    # Initializes the gameplay dictionary, rounding each game's playtime to 2 decimal places
+    top_games = {}
+    for game_name in game_list:
+        top_games[game_name] = round(totals.get(game_name, 0), 2) if game_name in game_records else 0
 
     if count:
         # Sort the list by highest hours played and shrink to count
@@ -828,22 +1109,34 @@ def GetPlaytime(game_list: dict, days: int = None, count: int = None, member: di
 
     return dict(sorted_list)
 
-# Filters game names of common bad strings and/or characters
-def FilterName(original: str):
-    Log(f"Activity name before filtering: {original}", LogType.DEBUG)
+# Moves history older than the retention window into the archive and monthly rollups, returns the number of days archived
+async def ArchiveHistory():
+    # Only recent history is held in memory when using the database
+    hot_days = Files.config['HistoryRetentionDays']
+    if not hot_days or Files.database:
+        return 0
+
+    await Files.LoadHistoryAsync()
+    expired = GetExpiredHistory(Files.games, hot_days)
+    if not expired:
+        return 0
 
-    # TODO: Update these replaces with case-insensitive replaces
-    filtered_name = original.replace("™", "")                           # Remove '™' from original
-    filtered_name = filtered_name.replace("®", "")                      # Remove '®' from filtered_name
-    filtered_name = filtered_name.replace("Xbox One", "")               # Remove 'Xbox One'
-    filtered_name = filtered_name.replace("for Xbox One", "")           # Remove 'for Xbox One'
-    filtered_name = filtered_name.replace("Demo", "")                   # Remove 'Demo'
-    filtered_name = StripAccents(filtered_name)                        # Remove accents
-    # filtered_name = string.capwords(filtered_name)                      # Capitalizes each word
-    filtered_name = filtered_name.strip()                               # Remove leading and trailing whitespace
+    # Writes the archive before the history is dropped so no detail can be lost
+    await asyncio.to_thread(Archive.Append, expired)
+    Archive.Merge(expired)
 
-    Log(f"Activity name after filtering: {filtered_name}", LogType.DEBUG)
-    return filtered_name
+    RollupHistory(Files.games, expired)
+    History.InvalidateArchived(list(expired.keys()))
+
+    # Toggles the updated flag for games
+    for game_name in expired:
+        Files.Update(FlagType.Games, True, f"Archived old history of {game_name}", [game_name])
+
+    return sum(len(days) for days in expired.values())
+
+# Filters game names of common bad strings and/or characters, configured by the ActivityNameRules
+def FilterName(original: str):
+    return Filter(original)
 
 # Create a class called DirectMessageView that subclasses discord.ui.View
 class DirectMessageView(discord.ui.View):
@@ -1171,7 +1464,7 @@ class PlaytimeView(discord.ui.View):
                 # Initialize the playtime message and game refernces for the games played
                 playtime_message = ""
                 game_refs = {}
-                for game_name, time in GetPlaytime(Files.games, 30, 5).items():
+                for game_name, time in GetTopGames(30, 5).items():
                     # Store a reference of the game data in game_refs
                     game_refs[game_name] = Files.games[game_name]
 
@@ -1193,7 +1486,7 @@ class PlaytimeView(discord.ui.View):
         async def callback(self, interaction):
             try:            
                 # Get the list of the top # of games
-                playtime_list = GetPlaytime(Files.games, 30, 5, interaction.user)
+                playtime_list = GetTopGames(30, 5, interaction.user)
                 if playtime_list:
                     # Initialize the playtime message and game refernces for the games played
                     playtime_message = ""
@@ -1226,22 +1519,48 @@ class AutoRolerPro(commands.Cog):
         self.bot = bot
         Log("AutorolerPro loaded!")
 
-        # Start the backup routine
+        # Reports how many journal records were replayed on top of the snapshots
+        if Files.journal:
+            Log(f"Replayed {Files.replayed} journal record(s) from {Files.journal_file}")
+
+        # Reports how long the files took to load, and their peak memory if benchmarked
+        load_message = f"Loaded files in {Files.load_time * 1000:.1f}ms"
+        if Files.load_peak_memory is not None:
+            load_message += f" with a peak memory of {Files.load_peak_memory / 1048576:.1f}MB"
+        Log(load_message)
+
+        # Start the backup, retention, metrics and rolling playtime routines
         self.BackupRoutine.start()
+        self.RetentionRoutine.start()
+        self.PerfExportRoutine.start()
+        self.RollingPlaytimeRoutine.start()
     
     async def cog_unload(self):
         self.BackupRoutine.cancel()
+        self.RetentionRoutine.cancel()
+        self.PerfExportRoutine.cancel()
+        self.RollingPlaytimeRoutine.cancel()
+
+        # Flushes any pending changes and closes the journal
+        log_message = await Files.Close()
+        await Unresolved.Save()
+        await Responses.Save()
+
+        # Closes the pooled IGDB connections
+        await IGDB.Close()
+        if log_message:
+            Log(f"Saving data before unloading ----------------------------------------{log_message}")
+
+        # Writes any queued log messages and stops the log writer
+        Log.Close()
 
     @tasks.loop(minutes = Files.config['BackupFrequency'])
     async def BackupRoutine(self):
-        # Initializes the log message
-        log_message = ""
-
-        # Update affected files with new data
-        Files.CheckForUpdate(FlagType.Games,   Files.games_file)
-        Files.CheckForUpdate(FlagType.Members, Files.members_file)
-        Files.CheckForUpdate(FlagType.Aliases, Files.aliases_file)
-        Files.CheckForUpdate(FlagType.Config,  Files.config_file)
+        # Update affected files with new data and initializes the log message
+        with Perf.Span("BackupRoutine"):
+            log_message = await Files.Backup()
+            await Unresolved.Save()
+            await Responses.Save()
 
         # Print log if not empty
         if log_message:
@@ -1251,6 +1570,24 @@ class AutoRolerPro(commands.Cog):
             # Logs the events of the backup routine
             Log(f"{log_header}{log_message}")
 
+    # Runs at midnight rather than right away, so starting the cog doesn't have to read the deferred history
+    @tasks.loop(time = midnight)
+    async def RetentionRoutine(self):
+        # Archives history older than the retention window
+        archived_days = await ArchiveHistory()
+        if archived_days:
+            Log(f"Archived {archived_days} day(s) of history older than {Files.config['HistoryRetentionDays']} days into {Files.archive_file}")
+
+    @tasks.loop(minutes = Files.config['PerfExportFrequency'])
+    async def PerfExportRoutine(self):
+        # Writes the latency statistics to the metrics file
+        await asyncio.to_thread(Perf.Export, Files.perf_file, Perf.GetReport())
+
+    @tasks.loop(time = midnight)
+    async def RollingPlaytimeRoutine(self):
+        # Subtracts the days that fell out of each rolling playtime window
+        Rolling.Expire()
+
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         """Assigned the New Member role to new members when they join the server"""
@@ -1268,6 +1605,7 @@ class AutoRolerPro(commands.Cog):
 
     # Detect when a member's presence changes
     @commands.Cog.listener(name='on_presence_update')
+    @Perf.Timed()
     async def on_presence_update(self, previous: discord.Member, current: discord.Member):
         # Get important information about the context of the event
         announcements_channel = current.guild.get_channel(Files.config['ChannelIDs']['Announcements'])
@@ -1320,6 +1658,10 @@ class AutoRolerPro(commands.Cog):
                         await test_channel.send(f"`{member['display_name']}` started playing `{filtered_name}`, and I found an alias with that name, but the game associated with it isn't in the list! Not sure how that happened!", silent = True)
                         return
                 else:
+                    # Exit if the activity recently failed to resolve to a game or was blacklisted, unless the game has been added since
+                    if Names.Resolve(filtered_name) not in Files.games and Unresolved.IsSkipped(filtered_name):
+                        return
+
                     # If there isn't a game recorded for the current activity already, add it
                     new_games, already_exists, failed_to_find = await AddGames(current.guild, [filtered_name])
                     if len(new_games) > 0:
@@ -1331,6 +1673,8 @@ class AutoRolerPro(commands.Cog):
                     elif len(already_exists) > 0:
                         game = list(already_exists.values())[0]
                     else:
+                        # Skips the activity for a while, only asking the admins once
+                        Unresolved.Miss(filtered_name)
                         await AddAlias(self.bot, current.guild, filtered_name, current)
                         return
                     
@@ -1341,15 +1685,15 @@ class AutoRolerPro(commands.Cog):
                 role = await GetRole(current.guild, game['name'], True) #current.guild.get_role(game['role'])
                 
                 # When somebody starts playing a game and if they are part of the role
-                if role in current.roles and game['name'] in member['games']: 
+                if role in current.roles and game.name in member.games: 
                     await test_channel.send(f"`{member['display_name']}` started playing `{filtered_name}`!", silent = True)
                 else:
                     # Exits if member opted out of getting notifications
-                    if member['opt_out']:
+                    if member.opt_out:
                         return
                 
                     # Exit if the member doesn't want to be bothered about this game
-                    if game['name'] in member['games'] and member['games'][game['name']]['tracked'] == False:
+                    if game.name in member.games and member.games[game.name].tracked == False:
                         # Informs the admin channel that the member is playing a game without it's role assigned
                         await test_channel.send(f"`{member['display_name']}` started playing `{filtered_name}`. They do not have or want the role assigned to them.", silent = True)
                     # TODO: Fix or remove direct message notification
@@ -1577,7 +1921,7 @@ class AutoRolerPro(commands.Cog):
             Files.aliases[alias] = role.name
 
             # Toggles the updated flag for aliases
-            Files.Update(FlagType.Aliases, True, f"Assigned a new alias, {alias}, to the {role.name} game!")
+            Files.Update(FlagType.Aliases, True, f"Assigned a new alias, {alias}, to the {role.name} game!", [alias])
 
             # Once a game is found, it sets the alias and exits
             await interaction.response.send_message(f"Thanks, {interaction.user.mention}! I've given {role.mention} an alias of `{alias}`.", files = await GetImages({Files.games[role.name]['name'] : Files.games[role.name]}))
@@ -1659,11 +2003,82 @@ class AutoRolerPro(commands.Cog):
         #     await ctx.reply(f"Could not find the specified channel!")
 
     @app_commands.command()
-    async def get_lowest_score(self, interaction: discord.Interaction):
-        """Returns the lowest scoring game"""
+    @app_commands.describe(count="Optional number of the lowest scoring games to list")
+    async def get_lowest_score(self, interaction: discord.Interaction, count: int = 1):
+        """Returns the lowest scoring game, or the lowest scoring games if a count is given"""
+
+        lowest = GetLowestScoringGames([], max(1, min(count, 25)))
+        if not lowest:
+            await interaction.response.send_message("I couldn't find any games with a role that could be removed!")
+        elif len(lowest) == 1:
+            game, score = lowest[0]
+            await interaction.response.send_message(f"`{game}` has the lowest score with {score} points.")
+        else:
+            message = "\n".join(f"{index}. `{game}` with {round(score, 2)} points" for index, (game, score) in enumerate(lowest, 1))
+            await interaction.response.send_message(f"Here are the {len(lowest)} lowest scoring games:\n{message}")
+
+    @app_commands.command()
+    async def perf_stats(self, interaction: discord.Interaction):
+        """Returns latency statistics of the bot's hot paths"""
+        # Get member that sent the command
+        member = interaction.user
+        guild = interaction.guild
+
+        # Exits if the member is not an admin
+        role: discord.Role = guild.get_role(Files.config['Roles']['Admin'])
+        if role and role.name != "deleted-role":
+            if role not in member.roles:
+                await interaction.response.send_message(f"Sorry, {member.mention}, I was unable to complete your request. You need to be part of the <@&{Files.config['Roles']['Admin']}> role to view performance stats!", ephemeral=True)
+                return
+        else:
+            await interaction.response.send_message(f"Sorry, {member.mention}, I was unable to complete your request. I was unable to find the role `ID:{Files.config['Roles']['Admin']}` - I'm, therefore, unable to verify your admin rights!", ephemeral=True)
+            return
+
+        stats = Perf.GetStats()
+        if not stats:
+            await interaction.response.send_message("I haven't recorded anything yet!", ephemeral=True)
+            return
+
+        # Formats the statistics into a table, latencies in milliseconds
+        longest_name = max(len(name) for name in stats)
+        message = f"{'SPAN'.ljust(longest_name)}  {'COUNT':>7} {'ERRORS':>6} {'P50':>9} {'P95':>9} {'P99':>9}\n"
+        for name, span in stats.items():
+            message += f"{name.ljust(longest_name)}  {span['count']:>7} {span['errors']:>6} {span['p50']:>9.2f} {span['p95']:>9.2f} {span['p99']:>9.2f}\n"
+
+        # Adds the hit rate of the IGDB response cache
+        cache_message = ", ".join(f"{kind} {kind_stats['hits']}/{kind_stats['hits'] + kind_stats['misses']} ({kind_stats['hit_rate']}%)" for kind, kind_stats in Responses.GetStats().items())
+
+        await interaction.response.send_message(f"__**Latency since {Perf.started.strftime('%Y-%m-%d %H:%M')} (ms)**__\n```\n{message}```\nIGDB cache hits: {cache_message} with {len(Responses.entries)} cached responses, and {IGDB.retries} requests retried after being rate limited. Cover store hits: {Covers.hits}/{Covers.hits + Covers.misses} with {len(Covers.sizes)} covers ({Covers.total_size / 1048576:.1f}MB)", ephemeral=True)
+
+    @app_commands.command()
+    async def filter_stats(self, interaction: discord.Interaction):
+        """Returns how often each activity name rule was applied"""
+        # Get member that sent the command
+        member = interaction.user
+        guild = interaction.guild
 
-        game, score = GetLowestScoringGame([])
-        await interaction.response.send_message(f"`{game}` has the lowest score with {score} points.")
+        # Exits if the member is not an admin
+        role: discord.Role = guild.get_role(Files.config['Roles']['Admin'])
+        if role and role.name != "deleted-role":
+            if role not in member.roles:
+                await interaction.response.send_message(f"Sorry, {member.mention}, I was unable to complete your request. You need to be part of the <@&{Files.config['Roles']['Admin']}> role to view filter stats!", ephemeral=True)
+                return
+        else:
+            await interaction.response.send_message(f"Sorry, {member.mention}, I was unable to complete your request. I was unable to find the role `ID:{Files.config['Roles']['Admin']}` - I'm, therefore, unable to verify your admin rights!", ephemeral=True)
+            return
+
+        if not Filter.hits:
+            await interaction.response.send_message("There aren't any activity name rules configured!", ephemeral=True)
+            return
+
+        # Formats the hit counts into a table, most applied rules first
+        longest_rule = max(len(rule) for rule in Filter.hits)
+        message = f"{'RULE'.ljust(longest_rule)}  {'HITS':>7}\n"
+        for rule, hits in sorted(Filter.hits.items(), key = lambda x:x[1], reverse = True):
+            message += f"{rule.ljust(longest_rule)}  {hits:>7}\n"
+
+        cached = Filter.lookups - Filter.misses
+        await interaction.response.send_message(f"__**Activity name rules**__\n```\n{message}```\n{Filter.lookups} names filtered, {cached} from the cache ({len(Filter.cache)} cached names)", ephemeral=True)
 
     @app_commands.command()
     async def clean_db(self, interaction: discord.Interaction):
@@ -1683,32 +2098,57 @@ class AutoRolerPro(commands.Cog):
         else:
             await interaction.response.send_message(f"Sorry, {member.mention}, I was unable to complete your request. I was unable to find the role `ID:{Files.config['Roles']['Admin']}` - I'm, therefore, unable to verify your admin rights!", ephemeral=True)
             return
+
+        # Gives the cleanup more than the few seconds an interaction has to be answered in
+        await interaction.response.defer(ephemeral=True)
         
         added_games = 0
         cleanups = 0
         duplicate_roles = 0
         added_datetimes = 0
+        added_colors = 0
 
         # Verifies every game has an added_datetime and role entry
         # If missing, add the missing entry
         for game, details in Files.games.items():
             if "added_datetime" not in details:
                 Files.games[game]["added_datetime"] = GetDateTime()
-                Files.Update(FlagType.Games, True, f"Added 'added_datetime' to {game}!")
+                Files.Update(FlagType.Games, True, f"Added 'added_datetime' to {game}!", [game, 'added_datetime'])
                 added_datetimes += 1
 
             if "role" not in details:
                 Files.games[game]["role"] = None
-                Files.Update(FlagType.Games, True, f"Added empty role entry to {game}!")
+                Files.Update(FlagType.Games, True, f"Added empty role entry to {game}!", [game, 'role'])
                 cleanups += 1
             
             if Files.games[game]["role"]:
                 guild_role: discord.Role = guild.get_role(Files.games[game]["role"])
                 if not guild_role:
                     Files.games[game]["role"] = None
-                    Files.Update(FlagType.Games, True, f"Removed obsolete role ID from {game}!")
+                    Files.Update(FlagType.Games, True, f"Removed obsolete role ID from {game}!", [game, 'role'])
                     cleanups += 1
 
+        # Looks up the missing cover urls of every game in as few requests as possible
+        missing_covers = [game for game, details in Files.games.items() if "cover_url" not in details and "id" in details]
+        if missing_covers:
+            urls = await GetCoverUrls([Files.games[game]['id'] for game in missing_covers])
+            for game in missing_covers:
+                Files.games[game]['cover_url'] = urls[Files.games[game]['id']]
+                Files.Update(FlagType.Games, True, f"Added missing cover url to {game}.", [game, 'cover_url'])
+                cleanups += 1
+
+        # Measures the dominant color of every game's cover that doesn't have one yet, processing the covers concurrently
+        missing_colors = [game for game, details in Files.games.items() if not details.get("color") and "cover_url" in details]
+        colors = await asyncio.gather(*[GetDominantColor(Files.games[game]['cover_url']) for game in missing_colors], return_exceptions = True)
+        for game, color in zip(missing_colors, colors):
+            if isinstance(color, Exception):
+                Log(f"Unable to get the dominant color of {game}'s cover: {color}", LogType.WARNING)
+                continue
+
+            Files.games[game]['color'] = color
+            Files.Update(FlagType.Games, True, f"Added missing color to {game}.", [game, 'color'])
+            added_colors += 1
+
         # Loops through each member in the guild
         for member in guild.Files.members:
             if member.bot:
@@ -1729,18 +2169,6 @@ class AutoRolerPro(commands.Cog):
                         Log(f"Adding {role.name} to {member.name}'s data!")
                         added_games += 1
 
-            # Removes known old/bad data from database
-            for game, details in member_db['games'].items():
-                if "name" in details:
-                    del member_db['games'][game]["name"]
-                    Files.Update(FlagType.Members, True, f"Cleaned up game data from {game}!")
-                    cleanups += 1
-
-                if "last_played" in details:
-                    del member_db['games'][game]["last_played"]
-                    Files.Update(FlagType.Members, True, f"Cleaned up game data from {game}!")
-                    cleanups +=1
-
         # Collects a list of duplicate roles from the server and deletes them
         seen = set()
         duplicates = [v for v in guild.roles if v.name in seen or seen.add(v.name)] 
@@ -1749,4 +2177,4 @@ class AutoRolerPro(commands.Cog):
             Log(f"Removed duplicate {role.name} role from the server!")
             duplicate_roles += 1
 
-        await interaction.response.send_message(f"I have successfully synced the database with the server! I found and added `{added_games}` missed games, cleaned up `{cleanups}` data entries, removed `{duplicate_roles}` duplicate roles, and added `{added_datetimes}` added-datetimes!", ephemeral=True)
\ No newline at end of file
+        await interaction.followup.send(f"I have successfully synced the database with the server! I found and added `{added_games}` missed games, cleaned up `{cleanups}` data entries, removed `{duplicate_roles}` duplicate roles, added `{added_datetimes}` added-datetimes, and added `{added_colors}` cover colors!", ephemeral=True)
\ No newline at end of file
@@ -1,2 +1,17 @@
 from .log import LogManager, LogType
-from .filemanager import FileManager, FlagType
\ No newline at end of file
+from .filemanager import FileManager, FlagType
+from .history import HistoryIndex
+from .retention import HistoryArchive, GetExpiredHistory, RollupHistory
+from .perf import PerfRecorder
+from .records import Game, Member, MemberGame
+from .names import NameIndex, NameFilter, StripAccents
+from .players import PlayerIndex
+from .scoring import ScoreIndex, ScoreInputs
+from .fuzzy import TrigramIndex
+from .listing import ListSets, SortedViews
+from .rolling import RollingPlaytime
+from .unresolved import UnresolvedNames
+from .igdb import IGDBClient, IGDBError, multiquery_size
+from .igdbcache import IGDBCache
+from .throttle import TokenBucket, SingleFlight
+from .covers import CoverStore, ProcessCover, GetCoverColor
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from io import BytesIO
+from PIL import Image
+import numpy as np
+import hashlib
+import os
+
+# Returns the most common color of an image as a hex string
+# Pixels are counted in a histogram of levels^3 buckets of similar colors, and the winning bucket's pixels are averaged
+def GetDominantColor(img: Image.Image, levels: int = 16) -> str:
+    # Resize image to speed up processing
+    img = img.convert('RGB')
+    img.thumbnail((100, 100))
+
+    pixels = np.asarray(img, dtype = np.uint8).reshape(-1, 3)
+    buckets = (pixels // (256 // levels)).astype(np.int32)
+    index = (buckets[:, 0] * levels + buckets[:, 1]) * levels + buckets[:, 2]
+
+    # Find the bucket that occurs most often
+    counts = np.bincount(index, minlength = levels ** 3)
+    dominant_color = pixels[index == counts.argmax()].mean(axis = 0).round().astype(int)
+
+    return '%02X%02X%02X' % tuple(dominant_color)
+
+# Decodes a downloaded cover once, returning it encoded as a PNG along with its dominant color, meant to be run in a worker thread
+def ProcessCover(content: bytes) -> tuple:
+    img = Image.open(BytesIO(content))
+    with BytesIO() as image_binary:
+        img.save(image_binary, 'PNG')
+        cover = image_binary.getvalue()
+
+    return cover, GetDominantColor(img)
+
+# Returns the dominant color of an already encoded cover, meant to be run in a worker thread
+def GetCoverColor(cover: bytes) -> str:
+    return GetDominantColor(Image.open(BytesIO(cover)))
+
+# Cover images already encoded as PNG, stored in one file per url hash
+# The least recently used files are deleted once the store grows past max_size bytes
+class CoverStore:
+    def __init__(self, covers_dir: str, max_size: int = 67108864):
+        self.covers_dir = covers_dir
+        self.max_size   = max_size
+        self.sizes      = OrderedDict()
+        self.total_size = 0
+        self.hits       = 0
+        self.misses     = 0
+
+        # Indexes the stored covers, oldest use first
+        os.makedirs(self.covers_dir, exist_ok = True)
+        entries = []
+        for entry in os.scandir(self.covers_dir):
+            if entry.is_file() and entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self.sizes[key] = size
+            self.total_size += size
+
+    # Returns the key of a url, a hash so any url maps to a safe file name
+    def GetKey(self, url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def GetFile(self, key: str) -> str:
+        return f"{self.covers_dir}/{key}.png"
+
+    # Returns the PNG bytes of a cover, or None if it isn't stored
+    def Get(self, url: str) -> bytes:
+        key = self.GetKey(url)
+        if key in self.sizes:
+            try:
+                with open(self.GetFile(key), "rb") as fp:
+                    data = fp.read()
+            except OSError:
+                self.Forget(key)
+            else:
+                # Marks the cover as recently used, on disk too so the order survives a restart
+                self.sizes.move_to_end(key)
+                os.utime(self.GetFile(key))
+                self.hits += 1
+                return data
+
+        self.misses += 1
+        return None
+
+    # Stores the PNG bytes of a cover, evicting the least recently used covers if the store is full
+    def Put(self, url: str, data: bytes):
+        key = self.GetKey(url)
+        temp_file = f"{self.GetFile(key)}.tmp"
+        with open(temp_file, "wb") as fp:
+            fp.write(data)
+        os.replace(temp_file, self.GetFile(key))
+
+        self.total_size += len(data) - self.sizes.get(key, 0)
+        self.sizes[key] = len(data)
+        self.sizes.move_to_end(key)
+
+        while self.total_size > self.max_size and len(self.sizes) > 1:
+            oldest = next(iter(self.sizes))
+            try:
+                os.remove(self.GetFile(oldest))
+            except OSError:
+                pass
+            self.Forget(oldest)
+
+    # Drops a cover from the index
+    def Forget(self, key: str):
+        self.total_size -= self.sizes.pop(key, 0)
@@ -0,0 +1,163 @@
+from .fileio import Loads, Dumps as DumpBytes
+from datetime import datetime, timedelta
+import sqlite3
+
+# Table definitions, history is stored as one playtime row per game, day and member
+schema = """
+CREATE TABLE IF NOT EXISTS games    (name  TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS members  (name  TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS aliases  (alias TEXT PRIMARY KEY, game TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS playtime (
+    game        TEXT NOT NULL,
+    day         TEXT NOT NULL,
+    member      TEXT NOT NULL,
+    playtime    REAL,
+    last_played TEXT,
+    PRIMARY KEY (game, day, member)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS aliases_game    ON aliases  (game);
+CREATE INDEX IF NOT EXISTS playtime_day    ON playtime (day, game);
+CREATE INDEX IF NOT EXISTS playtime_member ON playtime (member, day);
+"""
+
+# Serializes a record to compact json
+def Dumps(data: any) -> str:
+    return DumpBytes(data).decode("utf-8")
+
+# Returns the YYYY-MM-DD date that a window of days reaches back to
+def GetCutoff(days: int) -> str:
+    return (datetime.now() - timedelta(days = days)).strftime('%Y-%m-%d')
+
+class Database:
+    def __init__(self, database_file: str):
+        self.database_file = database_file
+
+        self.connection = sqlite3.connect(database_file)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(schema)
+
+    # Returns true if nothing has been stored in the database yet
+    def IsEmpty(self) -> bool:
+        for table in ["games", "members", "aliases"]:
+            if self.connection.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                return False
+        return True
+
+    # Loads every collection, only including the history within the last hot_days days
+    def Load(self, hot_days: int):
+        games   = {name: Loads(data) for name, data in self.connection.execute("SELECT name, data FROM games")}
+        members = {name: Loads(data) for name, data in self.connection.execute("SELECT name, data FROM members")}
+        aliases = {alias: game for alias, game in self.connection.execute("SELECT alias, game FROM aliases")}
+
+        rows = self.connection.execute("SELECT game, day, member, playtime, last_played FROM playtime WHERE day >= ?", (GetCutoff(hot_days),))
+        for game, day, member, playtime, last_played in rows:
+            if game not in games:
+                continue
+
+            entry = games[game].setdefault('history', {}).setdefault(day, {}).setdefault(member, {})
+            if playtime is not None:
+                entry['playtime'] = playtime
+            if last_played is not None:
+                entry['last_played'] = last_played
+
+        return games, members, aliases
+
+    # Writes the history entry of a member on a given day, removing it if missing
+    def WriteEntry(self, game: str, day: str, member: str, entry: dict = None):
+        if entry is None:
+            self.connection.execute("DELETE FROM playtime WHERE game = ? AND day = ? AND member = ?", (game, day, member))
+        else:
+            self.connection.execute("INSERT OR REPLACE INTO playtime VALUES (?, ?, ?, ?, ?)", (game, day, member, entry.get('playtime'), entry.get('last_played')))
+
+    # Writes every member entry of a game's day
+    def WriteDay(self, game: str, day: str, members: dict = None):
+        self.connection.execute("DELETE FROM playtime WHERE game = ? AND day = ?", (game, day))
+        for member, entry in (members or {}).items():
+            self.WriteEntry(game, day, member, entry)
+
+    # Writes a game record, storing its history as playtime rows
+    def WriteGame(self, name: str, record: dict = None):
+        if record is None:
+            self.connection.execute("DELETE FROM games WHERE name = ?", (name,))
+            self.connection.execute("DELETE FROM playtime WHERE game = ?", (name,))
+            return
+
+        self.connection.execute("INSERT OR REPLACE INTO games VALUES (?, ?)", (name, Dumps({k: v for k, v in record.items() if k != 'history'})))
+
+        # Replaces the days that are held in memory, older days are left untouched
+        for day, members in record.get('history', {}).items():
+            self.WriteDay(name, day, members)
+
+    # Writes a single changed entry of a collection, described by its path
+    def Write(self, collection: str, path: list, data: dict):
+        key = path[0]
+        if collection == "games":
+            record = data.get(key)
+            if record is None or len(path) == 1 or path[1] != 'history':
+                self.WriteGame(key, record)
+            elif len(path) == 2:
+                self.connection.execute("DELETE FROM playtime WHERE game = ?", (key,))
+                self.WriteGame(key, record)
+            elif len(path) == 3:
+                self.WriteDay(key, path[2], record.get('history', {}).get(path[2]))
+            else:
+                self.WriteEntry(key, path[2], path[3], record.get('history', {}).get(path[2], {}).get(path[3]))
+
+        elif collection == "members":
+            if key in data:
+                self.connection.execute("INSERT OR REPLACE INTO members VALUES (?, ?)", (key, Dumps(data[key])))
+            else:
+                self.connection.execute("DELETE FROM members WHERE name = ?", (key,))
+
+        elif collection == "aliases":
+            if key in data:
+                self.connection.execute("INSERT OR REPLACE INTO aliases VALUES (?, ?)", (key, data[key]))
+            else:
+                self.connection.execute("DELETE FROM aliases WHERE alias = ?", (key,))
+
+    # Writes an entire collection, removing entries that no longer exist
+    def WriteCollection(self, collection: str, data: dict):
+        if collection == "games":
+            for (name,) in self.connection.execute("SELECT name FROM games").fetchall():
+                if name not in data:
+                    self.WriteGame(name)
+            for name, record in data.items():
+                self.WriteGame(name, record)
+        else:
+            self.connection.execute(f"DELETE FROM {collection}")
+            for key in data:
+                self.Write(collection, [key], data)
+
+    # One-shot migration of the existing json collections into the database
+    def Import(self, games: dict, members: dict, aliases: dict):
+        with self.connection:
+            self.WriteCollection("games", games)
+            self.WriteCollection("members", members)
+            self.WriteCollection("aliases", aliases)
+
+    # Returns the total playtime per game over the last number of given days, optionally for a single member
+    def GetPlaytime(self, days: int = None, member_name: str = None) -> dict:
+        query = "SELECT game, SUM(playtime) FROM playtime WHERE playtime IS NOT NULL"
+        args = []
+        if days:
+            query += " AND day > ?"
+            args.append(GetCutoff(days))
+        if member_name:
+            query += " AND member = ?"
+            args.append(member_name)
+
+        return {game: total for game, total in self.connection.execute(f"{query} GROUP BY game", args)}
+
+    # Returns the most recent day a game was played, or None if it has never been played
+    def GetLastPlayed(self, game_name: str) -> str:
+        return self.connection.execute("SELECT MAX(day) FROM playtime WHERE game = ?", (game_name,)).fetchone()[0]
+
+    # Commits any pending point updates
+    def Commit(self):
+        self.connection.commit()
+
+    # Commits and closes the connection
+    def Close(self):
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,65 @@
+from .records import Record
+import tempfile
+import json
+import os
+
+# Uses orjson when it's installed, falling back to the standard library
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Decodes json from a string or bytes
+def Loads(data: any) -> any:
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Converts values json can't encode, records become dictionaries and anything else a string
+def Encode(value: any) -> any:
+    if isinstance(value, Record):
+        return value.ToDict()
+    return str(value)
+
+# Encodes data to json bytes, compact unless an indent is given
+def Dumps(data: any, indent: int = None) -> bytes:
+    if orjson:
+        # Datetimes are passed to str() so both codecs produce the same text
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default = Encode, option = option)
+
+    if indent:
+        return json.dumps(data, indent = indent, default = Encode, ensure_ascii = False).encode("utf-8")
+    return json.dumps(data, separators = (',', ':'), default = Encode, ensure_ascii = False).encode("utf-8")
+
+# Reads a json file
+def ReadJson(file: str) -> any:
+    with open(file, "rb") as fp:
+        return Loads(fp.read())
+
+# Writes data to a temporary file and swaps it in, so a crash never leaves a truncated file behind
+def WriteAtomic(file: str, data: any, indent: int = 2):
+    directory = os.path.dirname(file) or "."
+    fd, temp_file = tempfile.mkstemp(dir = directory, prefix = f".{os.path.basename(file)}.", suffix = ".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(Dumps(data, indent))
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(temp_file, file)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+    # Persists the rename itself, not supported on every platform
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass
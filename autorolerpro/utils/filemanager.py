@@ -1,6 +1,15 @@
 
+from .fileio import ReadJson, WriteAtomic
+from .database import Database
+from .shards import ShardStore
+from .journal import Journal
+from .records import Game, Member, MigrateRecords, ToRecords, schema_version
+from collections.abc import Mapping
 from enum import Enum
-import json
+import asyncio
+import tracemalloc
+import pickle
+import time
 import os
 
 default_config = {
@@ -26,11 +35,37 @@ default_config = {
     'WhitelistEnabled': False,
     'WhitelistMembers': [],
     'ActivityBlacklist': ["Spotify"],
+    'ActivityNameRules': ["™", "®", "for Xbox One", "Xbox One", "Demo"],
     'DebugMode': True,
     'AliasMaxAttempts': 5,
+    'UnresolvedNameHours': 24,
+    'UnresolvedNameBackoff': 2,
+    'UnresolvedNameMaxHours': 720,
     'BackupFrequency': 1,
     'AllowEroticTitles': False,
+    'IGDBCacheHours': {
+        'search': 168,
+        'game': 720,
+        'cover': 720,
+        'color': 720
+    },
+    'IGDBCacheMaxEntries': 4096,
+    'CoverCacheMaxSize': 67108864,
     'MaxRoleCount': 200,
+    'StorageEngine': "json",
+    'JournalCompactFrequency': 60,
+    'JournalMaxSize': 16777216,
+    'DatabaseHotDays': 2,
+    'HistoryRetentionDays': 90,
+    'LogMaxSize': 5242880,
+    'LogRotateHours': 168,
+    'LogBackupCount': 10,
+    'LogCompress': True,
+    'PerfExportFrequency': 5,
+    'CompactFiles': True,
+    'DeferHistoryLoad': True,
+    'StartupBenchmark': False,
+    'SchemaVersion': 0,
     'DefaultGameCover': "https://images.igdb.com/igdb/image/upload/t_cover_big/nocover.png"
 }
 
@@ -41,44 +76,167 @@ class FlagType(Enum):
     Aliases  = 3
     Config   = 4
 
+# Maximum number of change comments kept per flag between saves
+max_comments = 10
+
+# Returns a clean flag, tracking which keys changed since the last save
+def NewFlag() -> dict:
+    return {'status': False, 'comments': [], 'skipped': 0, 'keys': set(), 'full': False}
+
+# Adds the changes of a flag whose save failed back into the current flag, keeping the changes made during the save
+def MergeFlag(flag_status: dict, failed_status: dict):
+    flag_status['status'] = True
+    flag_status['keys'] |= failed_status['keys']
+    flag_status['full'] = flag_status['full'] or failed_status['full']
+
+    comments = failed_status['comments'] + flag_status['comments']
+    flag_status['skipped'] += failed_status['skipped'] + max(0, len(comments) - max_comments)
+    flag_status['comments'] = comments[:max_comments]
+
+# Formats the change comments of a flag for the log
+def FormatComments(flag_status: dict) -> str:
+    comment = "".join(f"\n  --{c}" for c in flag_status['comments'])
+    if flag_status['skipped']:
+        comment += f"\n  --...and {flag_status['skipped']} more change(s)"
+    return comment
+
 # Dictionary of updated file flags
 update_flags = {
-    FlagType.Games:   {'status': False, 'comment': ""}, 
-    FlagType.Members: {'status': False, 'comment': ""}, 
-    FlagType.Aliases: {'status': False, 'comment': ""}, 
-    FlagType.Config:  {'status': False, 'comment': ""}
+    FlagType.Games:   NewFlag(), 
+    FlagType.Members: NewFlag(), 
+    FlagType.Aliases: NewFlag(), 
+    FlagType.Config:  NewFlag()
+}
+
+# Collection names of each flag type, used for attribute lookups and journal records
+collection_names = {
+    FlagType.Games:   "games",
+    FlagType.Members: "members",
+    FlagType.Aliases: "aliases",
+    FlagType.Config:  "config"
 }
 
 # Initializes the privded file and returns true if new
 def InitializeFile(file: str) -> any:
     if os.path.isfile(file):
-        with open(file, "r") as fp:
-            data = json.load(fp)
+        data = ReadJson(file)
     else:
         data = {}
-        with open(file, "w") as fp:
-            json.dump(data, fp, indent = 2, default = str, ensure_ascii = False)
+        WriteAtomic(file, data)
 
     return data
 
+# Returns the history kept in a separate file, or nothing if there isn't one
+def ReadHistory(history_file: str) -> dict:
+    return ReadJson(history_file) if os.path.isfile(history_file) else {}
+
+# Adds the history kept in a separate file back into the games, skipping games removed since it was written
+def MergeHistory(games: dict, history_file: str, history: dict = None) -> dict:
+    if history is None:
+        history = ReadHistory(history_file)
+
+    for game_name, game_history in history.items():
+        if game_name in games:
+            games[game_name]['history'] = game_history
+    return games
+
+# Restores a snapshot, either a pickled collection or a dictionary of pickled records
+def RestoreSnapshot(snapshot: any) -> dict:
+    if isinstance(snapshot, dict):
+        return {key: pickle.loads(data) for key, data in snapshot.items()}
+    return pickle.loads(snapshot)
+
+# Restores a snapshot and writes it to file, meant to be run in a worker thread
+def WriteSnapshot(file: str, snapshot: any, indent: int = 2):
+    WriteAtomic(file, RestoreSnapshot(snapshot), indent)
+
+# Restores a games snapshot and writes the history of every game to its own file, meant to be run in a worker thread
+# The history file is skipped if it was never loaded, since it can't have changed
+def WriteGamesSnapshot(file: str, history_file: str, snapshot: any, indent: int = 2):
+    games = RestoreSnapshot(snapshot)
+    history = {game_name: game.pop('history') for game_name, game in games.items() if 'history' in game}
+    if history_file:
+        WriteAtomic(history_file, history, indent)
+    WriteAtomic(file, games, indent)
+
+# Restores a pickled set of changed records and writes their shards, meant to be run in a worker thread
+def WriteShards(store: ShardStore, snapshot: bytes):
+    records, deleted, keys = pickle.loads(snapshot)
+    if keys is None:
+        store.SaveAll(records)
+    else:
+        store.Save(records, deleted, keys)
+
+# Restores a pickled collection snapshot and writes it to the database through a connection of its own, meant to be run in a worker thread
+def WriteDatabaseSnapshot(database_file: str, collection: str, snapshot: bytes):
+    database = Database(database_file)
+    try:
+        with database.connection:
+            database.WriteCollection(collection, pickle.loads(snapshot))
+    finally:
+        database.connection.close()
+
 class FileManager:
     games_file   = None
     members_file = None
     aliases_file = None
     config_file  = None
     log_file     = None
+    journal_file = None
+    database_file = None
+    games_dir    = None
+    members_dir  = None
+    archive_file = None
+    perf_file    = None
+    history_file = None
+    unresolved_file = None
+    igdb_cache_file = None
+    covers_dir      = None
 
     config  = None
     games   = None
     members = None
     aliases = None
 
+    journal         = None
+    database        = None
+    shards          = None
+    replayed        = 0
+    last_compaction = 0
+    backup_lock     = None
+    listeners       = None
+    record_pickles  = None
+
+    history_deferred = False
+    history_loaded   = False
+    load_time        = 0
+    load_peak_memory = None
+
     def __init__(self, docker_cog_path: str):
         self.games_file       = f"{docker_cog_path}/games.json"
         self.members_file     = f"{docker_cog_path}/members.json"
         self.aliases_file     = f"{docker_cog_path}/aliases.json"
         self.config_file      = f"{docker_cog_path}/config.json"
         self.log_file         = f"{docker_cog_path}/log.txt"
+        self.journal_file     = f"{docker_cog_path}/journal.jsonl"
+        self.database_file    = f"{docker_cog_path}/autorolerpro.db"
+        self.games_dir        = f"{docker_cog_path}/games"
+        self.members_dir      = f"{docker_cog_path}/members"
+        self.archive_file     = f"{docker_cog_path}/history_archive.jsonl"
+        self.perf_file        = f"{docker_cog_path}/perf_stats.json"
+        self.history_file     = f"{docker_cog_path}/games_history.json"
+        self.unresolved_file  = f"{docker_cog_path}/unresolved_names.json"
+        self.igdb_cache_file  = f"{docker_cog_path}/igdb_cache.json"
+        self.covers_dir       = f"{docker_cog_path}/covers"
+
+        # Prevents overlapping backups from writing the same files
+        self.backup_lock = asyncio.Lock()
+
+        # Callbacks notified with the path of every change, used to keep derived indexes in sync
+        self.listeners = {flag: [] for flag in FlagType}
+
+        # Pickles of the games and members as of their last save, so saves only pickle the records that changed
+        self.record_pickles = {FlagType.Games: {}, FlagType.Members: {}}
 
         # Create the docker_cog_path if it doesn't already exist
         os.makedirs(docker_cog_path, exist_ok = True)
@@ -86,43 +244,317 @@ class FileManager:
         # Initializes the config file
         self.config = InitializeFile(self.config_file)
 
+        # Measures how long loading takes, and optionally its peak memory
+        benchmark = self.config.get('StartupBenchmark', False)
+        if benchmark:
+            tracemalloc.start()
+        start_time = time.perf_counter()
+
         # Add missing default config entries
         for entry, value in default_config.items():
             if entry not in self.config:
                 self.config[entry] = value
-                update_flags[FlagType.Config] = {'status': True, 'comment': "Added default configuration item(s)"}
+                self.Update(FlagType.Config, True, f"Added default configuration item, {entry}")
 
         # Saves the updated config file if necessary
         if update_flags[FlagType.Config]['status']:
-            with open(self.config_file, "w") as fp:
-                json.dump(self.config, fp, indent = 2, default = str, ensure_ascii = False)
+            WriteAtomic(self.config_file, self.config)
+
+        # Loads the collections from the database, only keeping recent history in memory
+        if self.config['StorageEngine'] == "sqlite":
+            self.database = Database(self.database_file)
+
+            # Imports the existing json files the first time the database is used
+            if self.database.IsEmpty():
+                self.database.Import(MergeHistory(InitializeFile(self.games_file), self.history_file), InitializeFile(self.members_file), InitializeFile(self.aliases_file))
+
+            self.games, self.members, self.aliases = self.database.Load(self.config['DatabaseHotDays'])
+
+        # Loads games and members from one file per record
+        elif self.config['StorageEngine'] == "sharded":
+            self.shards = {FlagType.Games: ShardStore(self.games_dir), FlagType.Members: ShardStore(self.members_dir)}
+            for flag, store in self.shards.items():
+                # Splits the existing json file into shards the first time the layout is used
+                if not store.Exists():
+                    records = InitializeFile(self.GetFile(flag))
+                    if flag == FlagType.Games:
+                        MergeHistory(records, self.history_file)
+                    store.SaveAll(records)
+
+                setattr(self, collection_names[flag], store.Load())
+
+            self.aliases = InitializeFile(self.aliases_file)
+
+        else:
+            self.games   = InitializeFile(self.games_file)
+            self.members = InitializeFile(self.members_file)
+            self.aliases = InitializeFile(self.aliases_file)
+
+            # Keeps the history of every game in its own file, which is only read once history is first needed
+            self.history_deferred = self.config['StorageEngine'] == "json" and self.config['DeferHistoryLoad']
+            if any('history' in game for game in self.games.values()):
+                # Games still holding their history are moved to the history file with the next save
+                self.history_loaded = True
+                if self.history_deferred:
+                    self.Update(FlagType.Games, True, f"Moved game history to {self.history_file}")
+            elif not self.history_deferred and os.path.isfile(self.history_file):
+                # Moves the history back into the games if deferred loading was turned off
+                self.LoadHistory()
+                self.Update(FlagType.Games, True, f"Moved game history back into {self.games_file}")
+
+        # Replays the journal on top of the latest snapshots
+        if self.config['StorageEngine'] == "journal":
+            self.journal = Journal(self.journal_file)
+            self.replayed = self.journal.Replay({collection_names[flag]: self.GetCollection(flag) for flag in [FlagType.Games, FlagType.Members, FlagType.Aliases]})
+            self.last_compaction = time.time()
+
+        # Upgrades records saved by an older version of the schema
+        if self.config['SchemaVersion'] < schema_version:
+            MigrateRecords(self.games, self.members, self.config['SchemaVersion'])
+            self.config['SchemaVersion'] = schema_version
+
+            comment = f"Migrated records to schema version {schema_version}"
+            self.Update(FlagType.Games, True, comment)
+            self.Update(FlagType.Members, True, comment)
+            self.Update(FlagType.Config, True, comment)
+
+        # Replaces the raw dictionaries with fixed-layout records
+        ToRecords(self.games, Game)
+        ToRecords(self.members, Member)
+
+        self.load_time = time.perf_counter() - start_time
+        if benchmark:
+            self.load_peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    # Registers a callback that receives the path of every change to the collection, or None if the change is unknown
+    def Subscribe(self, flag: FlagType, listener):
+        self.listeners[flag].append(listener)
+
+    # Returns the in-memory collection associated with the flag
+    def GetCollection(self, flag: FlagType) -> dict:
+        return getattr(self, collection_names[flag])
 
-        self.games   = InitializeFile(self.games_file)
-        self.members = InitializeFile(self.members_file)
-        self.aliases = InitializeFile(self.aliases_file)
+    # Returns the file associated with the flag
+    def GetFile(self, flag: FlagType) -> str:
+        return getattr(self, f"{collection_names[flag]}_file")
+
+    # Updates the specified flag to queue for the backup routine, the first key of the path marks the changed record
+    # When a path to the changed entry is provided, the journal or database receives the change directly instead
+    def Update(self, flag: FlagType, status: bool = False, comment: str = "", path: list = None):
+        if status:
+            for listener in self.listeners[flag]:
+                listener(path)
 
-    # Updates the specified flag to queue for the backup routine
-    def Update(self, flag: FlagType, status: bool = False, comment: str = ""):
         if not status:
-            update_flags[flag] = {'status': False, 'comment': ""}
+            update_flags[flag] = NewFlag()
+        elif self.journal and path and flag != FlagType.Config:
+            self.Record(flag, path)
+        elif self.database and path and flag != FlagType.Config:
+            self.database.Write(collection_names[flag], path, self.GetCollection(flag))
+        else:
+            flag_status = update_flags[flag]
+            flag_status['status'] = True
+
+            # Keeps the comments bounded between saves
+            if len(flag_status['comments']) < max_comments:
+                flag_status['comments'].append(comment)
+            else:
+                flag_status['skipped'] += 1
+
+            # Changes without a path can only be saved by writing every record
+            if path:
+                flag_status['keys'].add(path[0])
+            else:
+                flag_status['full'] = True
+
+    # Appends the current value at the path to the journal, or a deletion if the entry no longer exists
+    def Record(self, flag: FlagType, path: list):
+        container = self.GetCollection(flag)
+        for key in path:
+            if not isinstance(container, Mapping) or key not in container:
+                self.journal.Append(collection_names[flag], path, deleted = True)
+                return
+            container = container[key]
+
+        self.journal.Append(collection_names[flag], path, container)
+
+    # Takes a cheap, consistent copy of the collection associated with the flag
+    def Snapshot(self, flag: FlagType) -> bytes:
+        return pickle.dumps(self.GetCollection(flag), pickle.HIGHEST_PROTOCOL)
+
+    # Takes a copy of the games or members for the json engine, only pickling the records changed since the last copy
+    def SnapshotRecords(self, flag: FlagType, flag_status: dict) -> dict:
+        collection = self.GetCollection(flag)
+        pickles = self.record_pickles[flag]
+        if flag_status['full']:
+            pickles.clear()
         else:
-            update_flags[flag] = {'status': status, 'comment': f"{update_flags[flag]['comment']}\n  --{comment}"}
+            for key in flag_status['keys']:
+                pickles.pop(key, None)
+
+        snapshot = {}
+        for key, record in collection.items():
+            data = pickles.get(key)
+            if data is None:
+                data = pickles[key] = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+            snapshot[key] = data
+
+        return snapshot
+
+    # Reads the deferred history file into the games, only on first use
+    def LoadHistory(self):
+        if not self.history_loaded:
+            self.history_loaded = True
+            MergeHistory(self.games, self.history_file)
+
+            # Every game picked up its history without being flagged
+            self.record_pickles[FlagType.Games].clear()
+
+    # Reads the deferred history file in a worker thread, only on first use
+    async def LoadHistoryAsync(self):
+        if self.history_loaded:
+            return
+
+        history = await asyncio.to_thread(ReadHistory, self.history_file)
+
+        # Keeps the history that was loaded while reading, since it may have changed since
+        if not self.history_loaded:
+            self.history_loaded = True
+            MergeHistory(self.games, self.history_file, history)
+            self.record_pickles[FlagType.Games].clear()
+
+    # Returns the indent of the collection snapshots, config is always indented since it's edited by hand
+    def GetIndent(self, flag: FlagType) -> int:
+        if flag != FlagType.Config and self.config['CompactFiles']:
+            return None
+        return 2
+
+    # Takes a copy of only the changed records of a sharded collection
+    def SnapshotShards(self, flag: FlagType, flag_status: dict) -> bytes:
+        collection = self.GetCollection(flag)
+        if flag_status['full']:
+            return pickle.dumps((collection, None, None), pickle.HIGHEST_PROTOCOL)
+
+        records = {key: collection[key] for key in flag_status['keys'] if key in collection}
+        deleted = [key for key in flag_status['keys'] if key not in collection]
+        return pickle.dumps((records, deleted, list(collection.keys())), pickle.HIGHEST_PROTOCOL)
+
+    # Writes the collection associated with the flag, serializing it in a worker thread
+    async def Save(self, flag: FlagType, flag_status: dict):
+        if self.database and flag != FlagType.Config:
+            # Commits the pending point updates first, so the worker's connection isn't kept waiting on them
+            self.database.Commit()
+            await asyncio.to_thread(WriteDatabaseSnapshot, self.database_file, collection_names[flag], self.Snapshot(flag))
+            return
+
+        # Only the shards of the changed records are written
+        if self.shards and flag in self.shards:
+            await asyncio.to_thread(WriteShards, self.shards[flag], self.SnapshotShards(flag, flag_status))
+            return
+
+        # Only the changed games and members are pickled, the rest reuse their pickle from an earlier save
+        snapshot = self.SnapshotRecords(flag, flag_status) if flag in self.record_pickles else self.Snapshot(flag)
+
+        if self.history_deferred and flag == FlagType.Games:
+            history_file = self.history_file if self.history_loaded else None
+            await asyncio.to_thread(WriteGamesSnapshot, self.games_file, history_file, snapshot, self.GetIndent(flag))
+            return
+
+        await asyncio.to_thread(WriteSnapshot, self.GetFile(flag), snapshot, self.GetIndent(flag))
 
     # Checks for updates of a particular file and writes to the file
-    def CheckForUpdate(self, flag: FlagType, file: str):
-        game_flag = update_flags[flag]
-        if game_flag['status']:
-            with open(file, "w") as fp:
-                json.dump(self.games, fp, indent = 2, default = str, ensure_ascii = False) 
+    async def CheckForUpdate(self, flag: FlagType) -> str:
+        log_message = ""
+
+        flag_status = update_flags[flag]
+        if flag_status['status']:
+            # Resets flag before writing so changes made during the write are picked up by the next backup
+            self.Update(flag)
+
+            try:
+                await self.Save(flag, flag_status)
+            except BaseException:
+                MergeFlag(update_flags[flag], flag_status)
+                raise
+
+            # Adds file update to log message
+            if self.database and flag != FlagType.Config:
+                log_message += f"\n  Successfully saved to {self.database_file} {FormatComments(flag_status)}"
+            elif self.shards and flag in self.shards:
+                saved = len(self.GetCollection(flag)) if flag_status['full'] else len(flag_status['keys'])
+                log_message += f"\n  Successfully saved {saved} record(s) to {self.shards[flag].directory} {FormatComments(flag_status)}"
+            else:
+                log_message += f"\n  Successfully saved to {self.GetFile(flag)} {FormatComments(flag_status)}"
+
+        return log_message
+
+    # Returns true if the journal has grown large or old enough to be folded into a snapshot
+    def CompactionDue(self) -> bool:
+        if self.journal.GetSize() > self.config['JournalMaxSize']:
+            return True
+        return time.time() - self.last_compaction > self.config['JournalCompactFrequency'] * 60
+
+    # Folds the journal into fresh snapshots of every collection and empties the journal
+    async def Compact(self) -> str:
+        log_message = ""
+
+        # Snapshots every collection and starts a new journal segment at the same moment
+        snapshots = {}
+        for flag in [FlagType.Games, FlagType.Members, FlagType.Aliases]:
+            snapshots[flag] = self.Snapshot(flag)
+            log_message += f"\n  Compacted journal into {self.GetFile(flag)} {FormatComments(update_flags[flag])}"
+            self.Update(flag)
+        self.journal.Rotate()
+
+        for flag, snapshot in snapshots.items():
+            await asyncio.to_thread(WriteSnapshot, self.GetFile(flag), snapshot, self.GetIndent(flag))
+
+        # Only discard the old segment once every snapshot has been written
+        self.journal.DiscardRotated()
+        self.last_compaction = time.time()
+
+        return log_message
+
+    # Writes any pending changes to disk and returns a summary for the log
+    async def Backup(self) -> str:
+        log_message = ""
+        start_time = time.perf_counter()
+
+        async with self.backup_lock:
+            data_flags = [FlagType.Games, FlagType.Members, FlagType.Aliases]
+            if self.journal:
+                # Changes without a journal path can only be persisted through a full compaction
+                if any(update_flags[flag]['status'] for flag in data_flags) or self.CompactionDue():
+                    log_message += await self.Compact()
+            else:
+                for flag in data_flags:
+                    log_message += await self.CheckForUpdate(flag)
+
+            log_message += await self.CheckForUpdate(FlagType.Config)
+
+            # Point updates are written as they happen, but only committed with the backup
+            if self.database:
+                self.database.Commit()
+
+        # Reports how long the backup took
+        if log_message:
+            log_message += f"\n  Backup completed in {(time.perf_counter() - start_time) * 1000:.1f}ms"
+
+        return log_message
 
-            # Adds games file update to log message
-            log_message += f"\n  Successfully saved to {file} {game_flag['comment']}"
+    # Flushes pending changes and releases open file handles
+    async def Close(self) -> str:
+        log_message = await self.Backup()
+        if self.journal:
+            self.journal.Close()
+        if self.database:
+            self.database.Close()
 
-            # Resets flag
-            self.Update(FlagType.Games)
+        return log_message
 
     # Writes or appends a message to the log_file
     def __call__(self):
 
         print("Hello World")
-        
\ No newline at end of file
+        
@@ -0,0 +1,81 @@
+from difflib import SequenceMatcher
+from collections import Counter
+import math
+
+# Returns the set of 3 character substrings of a string
+def GetTrigrams(s: str) -> set:
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+# Inverted index from trigrams to names, used to shortlist names before scoring their similarity to a filter
+# Only names sharing at least min_shared of the filter's trigrams are scored, so a similar name sharing fewer trigrams isn't matched
+class TrigramIndex:
+    def __init__(self, min_similarity: float = 0.55, min_shared: float = 0.25):
+        self.min_similarity = min_similarity
+        self.min_shared     = min_shared
+        self.lowered        = {}
+        self.postings       = {}
+
+    # Indexes every name from scratch
+    def Rebuild(self, names: list):
+        self.lowered  = {}
+        self.postings = {}
+        for name in names:
+            self.Add(name)
+
+    def Add(self, name: str):
+        if name in self.lowered:
+            return
+
+        lowered = name.lower()
+        self.lowered[name] = lowered
+
+        for trigram in GetTrigrams(lowered):
+            self.postings.setdefault(trigram, set()).add(name)
+
+    def Remove(self, name: str):
+        lowered = self.lowered.pop(name, None)
+        if lowered is None:
+            return
+
+        for trigram in GetTrigrams(lowered):
+            names = self.postings.get(trigram)
+            if names:
+                names.discard(name)
+                if not names:
+                    del self.postings[trigram]
+
+    # Returns the shortlisted names that contain the filter or are similar enough to it
+    def Search(self, list_filter: str) -> set:
+        list_filter = list_filter.strip().lower()
+        if not list_filter:
+            return set(self.lowered)
+
+        # Filters without a trigram can be contained in any name, so every name is scored
+        trigrams = GetTrigrams(list_filter)
+        if not trigrams:
+            candidates = self.lowered.keys()
+        else:
+            # Names containing the filter share every one of its trigrams, so they always make the shortlist
+            shared = Counter()
+            for trigram in trigrams:
+                shared.update(self.postings.get(trigram, ()))
+
+            min_shared = max(1, math.ceil(len(trigrams) * self.min_shared))
+            candidates = [name for name, count in shared.items() if count >= min_shared]
+
+        # The filter is set as the second sequence, which SequenceMatcher caches between comparisons
+        matcher = SequenceMatcher(None, "", list_filter)
+
+        matches = set()
+        for name in candidates:
+            lowered = self.lowered[name]
+            if list_filter in lowered:
+                matches.add(name)
+                continue
+
+            # Checks the cheap upper bounds before the full similarity ratio
+            matcher.set_seq1(lowered)
+            if matcher.real_quick_ratio() >= self.min_similarity and matcher.quick_ratio() >= self.min_similarity and matcher.ratio() >= self.min_similarity:
+                matches.add(name)
+
+        return matches
@@ -0,0 +1,187 @@
+from .retention import HistoryArchive, GetRollupPlaytime
+from datetime import date, datetime, timedelta
+import numpy as np
+
+# Member id marking a day without any member entries
+empty_day = -1
+
+# Converts a YYYY-MM-DD string to a day ordinal
+def ToOrdinal(day: str) -> int:
+    return date.fromisoformat(day).toordinal()
+
+# Converts a day ordinal back to a YYYY-MM-DD string
+def FromOrdinal(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+# Returns the ordinal of the first day excluded from a window of the last number of given days
+def GetCutoff(days: int) -> int:
+    return (datetime.now() - timedelta(days = days)).toordinal()
+
+# Interns member names so every series can refer to them by a small integer id
+class MemberTable:
+    def __init__(self):
+        self.names = []
+        self.ids   = {}
+
+    # Returns the id of the member name, assigning a new one if needed
+    def GetId(self, name: str) -> int:
+        member_id = self.ids.get(name)
+        if member_id is None:
+            member_id = len(self.names)
+            self.names.append(name)
+            self.ids[name] = member_id
+        return member_id
+
+    # Returns the id of the member name without assigning one
+    def FindId(self, name: str) -> int:
+        return self.ids.get(name)
+
+# Compact, array-backed playtime history of a single game, one row per member per day
+class PlaytimeSeries:
+    __slots__ = ('days', 'members', 'hours', 'open_sessions')
+
+    def __init__(self, days: np.ndarray, members: np.ndarray, hours: np.ndarray, open_sessions: dict):
+        self.days          = days
+        self.members       = members
+        self.hours         = hours
+        self.open_sessions = open_sessions
+
+    # Builds a series from the json shape of a game's history: {date: {member_name: {'playtime', 'last_played'}}}
+    @classmethod
+    def FromHistory(cls, history: dict, member_table: MemberTable):
+        days, members, hours = [], [], []
+        open_sessions = {}
+
+        for day, day_value in history.items():
+            ordinal = ToOrdinal(day)
+
+            # Keeps days without entries so the conversion stays lossless
+            if not day_value:
+                days.append(ordinal)
+                members.append(empty_day)
+                hours.append(np.nan)
+                continue
+
+            for name, details in day_value.items():
+                member_id = member_table.GetId(name)
+                days.append(ordinal)
+                members.append(member_id)
+
+                # NaN marks an entry without any recorded playtime
+                hours.append(details.get('playtime', np.nan))
+
+                if 'last_played' in details:
+                    open_sessions[(ordinal, member_id)] = details['last_played']
+
+        return cls(np.array(days, dtype = np.int32), np.array(members, dtype = np.int32), np.array(hours, dtype = np.float32), open_sessions)
+
+    # Converts the series back to the json shape of a game's history
+    def ToHistory(self, member_table: MemberTable) -> dict:
+        history = {}
+        for ordinal, member_id, hours in zip(self.days.tolist(), self.members.tolist(), self.hours.tolist()):
+            day_value = history.setdefault(FromOrdinal(ordinal), {})
+            if member_id == empty_day:
+                continue
+
+            details = {}
+            if hours == hours:
+                # Playtime is stored with 2 decimal places, which float32 restores exactly after rounding
+                details['playtime'] = round(hours, 2)
+            if (ordinal, member_id) in self.open_sessions:
+                details['last_played'] = self.open_sessions[(ordinal, member_id)]
+
+            day_value[member_table.names[member_id]] = details
+
+        return history
+
+    # Returns the total playtime for days after the since ordinal, optionally for a single member
+    def GetPlaytime(self, since: int = None, member_id: int = None) -> float:
+        mask = ~np.isnan(self.hours)
+        if since is not None:
+            mask &= self.days > since
+        if member_id is not None:
+            mask &= self.members == member_id
+
+        return float(self.hours[mask].sum(dtype = np.float64))
+
+    # Returns the ordinal of the most recent day in the series, or None if empty
+    def GetLastPlayed(self) -> int:
+        if len(self.days) == 0:
+            return None
+        return int(self.days.max())
+
+# Lazily built series for every game, rebuilt only after a game's history changes
+# Older history can be folded into monthly rollups and moved to an archive that is only read for long windows
+class HistoryIndex:
+    def __init__(self, archive: HistoryArchive = None, hot_days: int = None):
+        self.member_table    = MemberTable()
+        self.series          = {}
+        self.archived_series = {}
+        self.archive         = archive
+        self.hot_days        = hot_days
+
+    # Returns the series of a game, building it from the game's history if needed
+    def Get(self, game_name: str, game: dict) -> PlaytimeSeries:
+        series = self.series.get(game_name)
+        if series is None:
+            series = PlaytimeSeries.FromHistory(game.get('history', {}), self.member_table)
+            self.series[game_name] = series
+        return series
+
+    # Returns the series of a game's archived history, reading the archive on first use
+    def GetArchived(self, game_name: str) -> PlaytimeSeries:
+        series = self.archived_series.get(game_name)
+        if series is None:
+            series = PlaytimeSeries.FromHistory(self.archive.GetHistory(game_name), self.member_table)
+            self.archived_series[game_name] = series
+        return series
+
+    # Drops the cached series of a game, or of every game if no name is given
+    def Invalidate(self, game_name: str = None):
+        if game_name is None:
+            self.series.clear()
+        else:
+            self.series.pop(game_name, None)
+
+    # Drops the cached archived series after days were moved into the archive
+    def InvalidateArchived(self, game_names: list):
+        for game_name in game_names:
+            self.archived_series.pop(game_name, None)
+
+    # Returns the total playtime per game over the last number of given days, optionally for a single member
+    # All-time totals add the monthly rollups, windows reaching past the hot history add the archived detail
+    def GetPlaytime(self, game_list: dict, days: int = None, member_name: str = None) -> dict:
+        since = GetCutoff(days) if days else None
+        reaches_archive = self.archive and days and self.hot_days and days > self.hot_days
+
+        # Builds any missing series first so every member name has been interned
+        series = {}
+        for game_name, game in game_list.items():
+            series[game_name] = [self.Get(game_name, game)]
+            if reaches_archive and 'last_archived' in game:
+                series[game_name].append(self.GetArchived(game_name))
+
+        member_id = None
+        if member_name is not None:
+            member_id = self.member_table.FindId(member_name)
+
+        totals = {}
+        for game_name, game_series in series.items():
+            total = 0
+
+            # Members that never played anything have no playtime in any series
+            if member_name is None or member_id is not None:
+                total += sum(s.GetPlaytime(since, member_id) for s in game_series)
+            if not days:
+                total += GetRollupPlaytime(game_list[game_name].get('rollup', {}), member_name)
+
+            totals[game_name] = total
+
+        return totals
+
+    # Returns the ordinal of the last day a game was played, or None if it was never played
+    def GetLastPlayed(self, game_name: str, game: dict) -> int:
+        last_played = self.Get(game_name, game).GetLastPlayed()
+        if last_played is None and 'last_archived' in game:
+            return ToOrdinal(game['last_archived'])
+        return last_played
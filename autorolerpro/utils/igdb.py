@@ -0,0 +1,80 @@
+from .throttle import TokenBucket
+import asyncio
+import aiohttp
+
+igdb_url = "https://api.igdb.com/v4"
+
+# IGDB allows 4 requests per second, requests that are turned away anyway are retried this many times
+requests_per_second = 4
+max_retries         = 4
+
+# Most queries the multiquery endpoint accepts in a single request
+multiquery_size = 10
+
+# Raised when IGDB answers with an error instead of results
+class IGDBError(Exception):
+    def __init__(self, response: any):
+        super().__init__(str(response))
+        self.response = response
+
+    # Returns true if the request was rejected because of expired or invalid credentials
+    def IsAuthorizationFailure(self) -> bool:
+        return isinstance(self.response, dict) and 'Authorization Failure' in str(self.response.get('message', ''))
+
+# Asynchronous IGDB client sharing one pooled, keep-alive session between requests
+# The session is created on first use, since it has to be created inside the running event loop
+class IGDBClient:
+    def __init__(self, config: dict, timeout: float = 15, connections: int = 8):
+        self.config      = config
+        self.timeout     = aiohttp.ClientTimeout(total = timeout)
+        self.connections = connections
+        self.session     = None
+        self.limiter     = TokenBucket(requests_per_second, requests_per_second)
+        self.retries     = 0
+
+    # Returns the shared session, creating it if it doesn't exist or was closed
+    def GetSession(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit = self.connections, keepalive_timeout = 60)
+            self.session = aiohttp.ClientSession(connector = connector, timeout = self.timeout)
+        return self.session
+
+    # Posts an apicalypse query to an IGDB endpoint and returns the decoded response, including error responses
+    # Requests wait for the rate limiter, and are queued again with a growing delay when IGDB answers with 429
+    async def Query(self, endpoint: str, query: str) -> any:
+        for attempt in range(max_retries + 1):
+            await self.limiter.Acquire()
+
+            # Credentials are read on every request, so updating the config takes effect right away
+            async with self.GetSession().post(f"{igdb_url}/{endpoint}", headers = self.config['IGDBCredentials'], data = query) as response:
+                if response.status != 429 or attempt == max_retries:
+                    return await response.json(content_type = None)
+
+                retry_after = response.headers.get('Retry-After')
+
+            # Holds back every other request too, since they'd be turned away as well
+            self.limiter.Drain()
+            self.retries += 1
+            await asyncio.sleep(float(retry_after) if retry_after and retry_after.isnumeric() else 0.5 * 2 ** attempt)
+
+    # Runs up to multiquery_size named queries in a single request, returning the results of each query by name
+    async def MultiQuery(self, queries: dict) -> dict:
+        body = "".join(f'query {endpoint} "{name}" {{ {query} }};' for name, (endpoint, query) in queries.items())
+        response = await self.Query('multiquery', body)
+
+        # Errors come back as a dictionary or as a list of entries without query names
+        if not isinstance(response, list) or any('name' not in entry for entry in response):
+            raise IGDBError(response)
+        return {entry['name']: entry.get('result', []) for entry in response}
+
+    # Downloads the raw bytes of a url, such as a cover image
+    async def Download(self, url: str) -> bytes:
+        async with self.GetSession().get(url) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    # Closes the session and its pooled connections
+    async def Close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
@@ -0,0 +1,85 @@
+from .fileio import ReadJson, WriteAtomic
+from .names import NormalizeName
+from collections import OrderedDict
+import asyncio
+import time
+import os
+
+# Hours each kind of response is kept for
+cache_hours = {
+    'search': 168,
+    'game':   720,
+    'cover':  720,
+    'color':  720
+}
+
+# Persistent cache of resolved IGDB responses, keyed by kind, the erotic title filter and the normalized query
+# Entries expire after the hours of their kind, and the least recently used entries are evicted past max_entries
+class IGDBCache:
+    def __init__(self, cache_file: str, hours: dict = cache_hours, max_entries: int = 4096):
+        self.cache_file  = cache_file
+        self.max_entries = max_entries
+        self.entries     = OrderedDict()
+        self.changed     = False
+
+        # Kinds missing from the given hours, like ones added after the config was saved, keep their default
+        self.hours  = {**cache_hours, **hours}
+        self.hits   = {kind: 0 for kind in self.hours}
+        self.misses = {kind: 0 for kind in self.hours}
+
+        if os.path.isfile(self.cache_file):
+            now = time.time()
+            for key, (expires, value) in ReadJson(self.cache_file).items():
+                if expires > now:
+                    self.entries[key] = (expires, value)
+
+    # Returns the key of a query, so differently cased or accented queries share an entry
+    def GetKey(self, kind: str, query: str, erotic: bool = False) -> str:
+        return f"{kind}:{int(erotic)}:{NormalizeName(str(query))}"
+
+    # Returns whether the query is cached and its value, since None is a valid value
+    def Get(self, kind: str, query: str, erotic: bool = False) -> tuple:
+        key = self.GetKey(kind, query, erotic)
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self.entries[key]
+                self.changed = True
+            self.misses[kind] += 1
+            return False, None
+
+        self.entries.move_to_end(key)
+        self.hits[kind] += 1
+        return True, entry[1]
+
+    def Set(self, kind: str, query: str, value: any, erotic: bool = False):
+        key = self.GetKey(kind, query, erotic)
+        self.entries[key] = (time.time() + self.hours[kind] * 3600, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last = False)
+        self.changed = True
+
+    # Returns the hits, misses and hit rate of every kind
+    def GetStats(self) -> dict:
+        stats = {}
+        for kind in self.hours:
+            lookups = self.hits[kind] + self.misses[kind]
+            stats[kind] = {'hits': self.hits[kind], 'misses': self.misses[kind], 'hit_rate': round(self.hits[kind] / lookups * 100, 1) if lookups else 0}
+        return stats
+
+    # Writes the unexpired entries to disk in a worker thread if they changed, least recently used first
+    async def Save(self):
+        if not self.changed:
+            return
+
+        now = time.time()
+        entries = {key: entry for key, entry in self.entries.items() if entry[0] > now}
+        self.changed = False
+
+        # Entries are never changed in place, so the copy can be encoded while the cache keeps changing
+        try:
+            await asyncio.to_thread(WriteAtomic, self.cache_file, entries, None)
+        except BaseException:
+            self.changed = True
+            raise
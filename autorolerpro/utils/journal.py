@@ -0,0 +1,100 @@
+from .fileio import Loads, Dumps
+import os
+
+# Walks the path inside of the container, creating missing dictionaries along the way
+def GetParent(container: dict, path: list, create: bool = False):
+    for key in path[:-1]:
+        if key not in container:
+            if not create:
+                return None
+            container[key] = {}
+        container = container[key]
+
+    return container
+
+# Applies a single journal record to the provided collections
+def ApplyRecord(collections: dict, record: dict):
+    collection = collections[record['c']]
+    path = record['p']
+
+    if 'd' in record:
+        # Removes the entry at the end of the path if it still exists
+        parent = GetParent(collection, path)
+        if parent is not None and path[-1] in parent:
+            del parent[path[-1]]
+    else:
+        # Sets the entry at the end of the path, constructing the path if missing
+        parent = GetParent(collection, path, True)
+        parent[path[-1]] = record['v']
+
+class Journal:
+    def __init__(self, journal_file: str):
+        self.journal_file = journal_file
+        self.rotated_file = f"{journal_file}.old"
+        self.fp = None
+
+    # Appends a compact mutation record to the end of the journal
+    def Append(self, collection: str, path: list, value: any = None, deleted: bool = False):
+        if deleted:
+            record = {'c': collection, 'p': path, 'd': 1}
+        else:
+            record = {'c': collection, 'p': path, 'v': value}
+
+        # Keeps the journal open between records to avoid reopening the file on every mutation
+        if not self.fp:
+            self.fp = open(self.journal_file, "ab")
+
+        self.fp.write(Dumps(record) + b"\n")
+        self.fp.flush()
+
+    # Replays every record in the journal onto the collections and returns the number of records applied
+    # A rotated segment left behind by an interrupted compaction is replayed first
+    def Replay(self, collections: dict) -> int:
+        count = 0
+        for file in [self.rotated_file, self.journal_file]:
+            if not os.path.isfile(file):
+                continue
+
+            with open(file, "rb") as fp:
+                for line in fp:
+                    # Skips blank lines and a partially written final record from an interrupted append
+                    try:
+                        record = Loads(line)
+                    except ValueError:
+                        continue
+
+                    ApplyRecord(collections, record)
+                    count += 1
+
+        return count
+
+    # Returns the current size of the journal in bytes
+    def GetSize(self) -> int:
+        if os.path.isfile(self.journal_file):
+            return os.path.getsize(self.journal_file)
+        return 0
+
+    # Moves the current records aside so new records start a fresh segment while a snapshot is written
+    def Rotate(self):
+        self.Close()
+        if not os.path.isfile(self.journal_file):
+            return
+
+        if os.path.isfile(self.rotated_file):
+            # Keeps the records of an earlier compaction that never finished
+            with open(self.journal_file, "rb") as source, open(self.rotated_file, "ab") as target:
+                target.write(source.read())
+            os.remove(self.journal_file)
+        else:
+            os.replace(self.journal_file, self.rotated_file)
+
+    # Removes the rotated segment once its records have been folded into a snapshot
+    def DiscardRotated(self):
+        if os.path.isfile(self.rotated_file):
+            os.remove(self.rotated_file)
+
+    # Closes the journal file handle if open
+    def Close(self):
+        if self.fp:
+            self.fp.close()
+            self.fp = None
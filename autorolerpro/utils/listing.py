@@ -0,0 +1,129 @@
+from datetime import date
+import bisect
+import math
+
+# Pages of a list of names, only building the page that's asked for
+class ListSets:
+    def __init__(self, names: list, collection: dict, set_amount: int):
+        self.names      = names
+        self.collection = collection
+        self.set_amount = set_amount
+
+    def __len__(self) -> int:
+        return math.ceil(len(self.names)/self.set_amount)
+
+    # Returns a page as a dictionary of names and details, skipping names removed since the list was made
+    def __getitem__(self, index: int) -> dict:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("page index out of range")
+
+        page = {}
+        for name in self.names[index * self.set_amount:(index + 1) * self.set_amount]:
+            details = self.collection.get(name)
+            if details is not None:
+                page[name] = details
+        return page
+
+# Materialized orderings of a collection's names, patched as names are added or removed
+# Lists are replaced rather than changed in place, so pages that were already handed out stay consistent
+# get_scores returns the recent playtime of the names, which the popularity order is sorted by
+class SortedViews:
+    def __init__(self, collection: dict, get_scores = None):
+        self.collection = collection
+        self.get_scores = get_scores
+        self.Rebuild()
+
+    # Rebuilds every ordering from the collection
+    def Rebuild(self):
+        self.present        = set(self.collection)
+        self.alphabetical   = sorted(self.collection)
+        self.added          = list(self.collection)
+        self.recent         = None
+        self.popularity     = None
+        self.popularity_day = None
+
+        # Scores of the popularity order, negated so it's sorted ascending, and the names whose score changed since
+        self.popularity_keys = None
+        self.scores          = {}
+        self.changed         = set()
+
+    def Add(self, name: str):
+        if name in self.present:
+            return
+        self.present.add(name)
+
+        alphabetical = list(self.alphabetical)
+        bisect.insort(alphabetical, name)
+        self.alphabetical = alphabetical
+
+        self.added = self.added + [name]
+        self.recent = None
+        self.changed.add(name)
+
+    def Remove(self, name: str):
+        if name not in self.present:
+            return
+        self.present.discard(name)
+
+        self.alphabetical = [n for n in self.alphabetical if n != name]
+        self.added = [n for n in self.added if n != name]
+        self.recent = None
+        self.changed.add(name)
+
+    # Marks a name to be moved within the popularity order after its playtime changed
+    def UpdatePopularity(self, name: str):
+        self.changed.add(name)
+
+    def GetAlphabetical(self) -> list:
+        return self.alphabetical
+
+    # Newest first, following the order names were added in
+    def GetRecentlyAdded(self) -> list:
+        if self.recent is None:
+            self.recent = self.added[::-1]
+        return self.recent
+
+    # Ordered by recent playtime, a moved name goes after the names it ties with
+    # Only the names whose playtime changed are moved, and the order is sorted again once a day as the window moves
+    def GetPopularity(self) -> list:
+        if not self.get_scores:
+            return self.added
+
+        if self.popularity is None or self.popularity_day != date.today():
+            scores = self.get_scores()
+            self.scores = {name: round(scores.get(name, 0), 2) for name in self.added}
+            self.popularity = sorted(self.added, key = lambda name: -self.scores[name])
+            self.popularity_keys = [-self.scores[name] for name in self.popularity]
+            self.popularity_day = date.today()
+            self.changed = set()
+        elif self.changed:
+            self.PatchPopularity()
+
+        return self.popularity
+
+    # Takes the changed names out of the popularity order and inserts the ones still present at their new score
+    def PatchPopularity(self):
+        changed, self.changed = self.changed, set()
+        scores = self.get_scores()
+
+        popularity = []
+        keys       = []
+        for name, key in zip(self.popularity, self.popularity_keys):
+            if name not in changed:
+                popularity.append(name)
+                keys.append(key)
+
+        for name in changed:
+            if name not in self.present:
+                self.scores.pop(name, None)
+                continue
+
+            self.scores[name] = round(scores.get(name, 0), 2)
+            index = bisect.bisect_right(keys, -self.scores[name])
+            popularity.insert(index, name)
+            keys.insert(index, -self.scores[name])
+
+        self.popularity      = popularity
+        self.popularity_keys = keys
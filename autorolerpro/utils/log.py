@@ -1,7 +1,11 @@
-
+import threading
+import atexit
+import shutil
+import glob
+import gzip
 import os
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 
 # Log Types
@@ -12,16 +16,48 @@ class LogType(Enum):
     ERROR   = "ERROR"
     FATAL   = "FATAL"
 
+# Number of queued messages that wakes the writer before the flush interval
+batch_size = 200
+
 class LogManager:
-    def __init__(self, log_file: str, debug_mode: bool):
-        self.log_file = log_file
-        self.debug_mode = debug_mode
+    def __init__(self, log_file: str, debug_mode: bool, max_size: int = 0, rotate_hours: int = 0, backup_count: int = 10, compress: bool = True, flush_interval: float = 1.0):
+        self.log_file       = log_file
+        self.debug_mode     = debug_mode
+        self.max_size       = max_size
+        self.rotate_hours   = rotate_hours
+        self.backup_count   = backup_count
+        self.compress       = compress
+        self.flush_interval = flush_interval
+
+        # Messages are queued by the caller and written in batches by a background thread
+        self.buffer     = []
+        self.condition  = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.closed     = False
+
+        self.segment_start = self.GetSegmentStart()
+
+        self.thread = threading.Thread(target = self.Run, name = "AutoRolerPro log writer", daemon = True)
+        self.thread.start()
+
+        # Makes sure queued messages reach the file if the process exits without unloading the cog
+        atexit.register(self.Close)
 
     # Returns a string formatted datetime of now
     def GetDateTime(self):
         return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-    # Writes or appends a message to the log_file
+    # Returns when the current log file was started, read from the timestamp of its first message
+    def GetSegmentStart(self) -> datetime:
+        if os.path.isfile(self.log_file):
+            try:
+                with open(self.log_file, "r") as fp:
+                    return datetime.strptime(fp.readline()[:19], '%Y-%m-%d %H:%M:%S')
+            except (ValueError, OSError):
+                pass
+        return datetime.now()
+
+    # Queues a message for the log_file
     def __call__(self, message: str, log_type: LogType = LogType.INFO):
         if log_type == LogType.DEBUG and not self.debug_mode:
             # Skips debug logs if debug mode is False
@@ -30,11 +66,80 @@ class LogManager:
         # Formats the log message
         formatted_message = f"{self.GetDateTime()} [{log_type.value}] {message}"
 
-        # Initializes the log file or appends to an existing one
-        if os.path.isfile(self.log_file):
-            with open(self.log_file, "a") as fp:
-                fp.write("\n")
-                fp.writelines(formatted_message)
-        else:
-            with open(self.log_file, "w") as fp:
-                fp.writelines(formatted_message)
\ No newline at end of file
+        with self.condition:
+            self.buffer.append(formatted_message)
+            closed = self.closed
+            if len(self.buffer) >= batch_size:
+                self.condition.notify()
+
+        # Once the writer has stopped, messages are written right away instead of being left in the queue
+        if closed:
+            self.Flush()
+
+    # Writes queued messages every flush interval until closed
+    def Run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.closed or len(self.buffer) >= batch_size, timeout = self.flush_interval)
+                closed = self.closed
+
+            self.Flush()
+            if closed:
+                return
+
+    # Writes every queued message to the log_file
+    def Flush(self):
+        with self.write_lock:
+            with self.condition:
+                messages, self.buffer = self.buffer, []
+
+            if not messages:
+                return
+
+            if self.RotationDue():
+                self.Rotate()
+
+            # Initializes the log file or appends to an existing one
+            if os.path.isfile(self.log_file) and os.path.getsize(self.log_file) > 0:
+                with open(self.log_file, "a") as fp:
+                    fp.write("\n" + "\n".join(messages))
+            else:
+                with open(self.log_file, "w") as fp:
+                    fp.write("\n".join(messages))
+                self.segment_start = datetime.now()
+
+    # Returns true if the log_file has outgrown its maximum size or age
+    def RotationDue(self) -> bool:
+        if not os.path.isfile(self.log_file):
+            return False
+        if self.max_size and os.path.getsize(self.log_file) >= self.max_size:
+            return True
+        return bool(self.rotate_hours) and datetime.now() - self.segment_start >= timedelta(hours = self.rotate_hours)
+
+    # Moves the log_file aside, optionally compresses it, and removes the oldest segments
+    def Rotate(self):
+        base, extension = os.path.splitext(self.log_file)
+        rotated_file = f"{base}.{datetime.now().strftime('%Y%m%d-%H%M%S')}{extension}"
+        os.replace(self.log_file, rotated_file)
+
+        if self.compress:
+            with open(rotated_file, "rb") as source, gzip.open(f"{rotated_file}.gz", "wb") as target:
+                shutil.copyfileobj(source, target)
+            os.remove(rotated_file)
+
+        # Timestamped names sort chronologically
+        segments = sorted(glob.glob(f"{glob.escape(base)}.*{extension}*"))
+        for segment in segments[:max(0, len(segments) - self.backup_count)]:
+            os.remove(segment)
+
+    # Stops the writer and flushes anything still queued
+    def Close(self):
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify()
+
+        self.thread.join(timeout = 5)
+        self.Flush()
+        atexit.unregister(self.Close)
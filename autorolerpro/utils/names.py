@@ -0,0 +1,143 @@
+from collections import OrderedDict
+import unicodedata
+import re
+
+whitespace = re.compile(r"\s+")
+
+# Number of raw activity names whose filtered result is remembered
+filter_cache_size = 4096
+
+# Normalizes and strips accents from string
+def StripAccents(s):
+   return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
+
+# Returns the key a name is looked up by, ignoring case, accents and repeated whitespace
+def NormalizeName(name: str) -> str:
+    return whitespace.sub(" ", StripAccents(name).casefold()).strip()
+
+# Maps normalized names of games and aliases to their canonical game names
+class NameIndex:
+    def __init__(self):
+        self.games       = {}
+        self.aliases     = {}
+        self.alias_games = {}
+
+    # Indexes every game and alias from scratch
+    def Rebuild(self, games: dict, aliases: dict):
+        self.RebuildGames(games)
+        self.RebuildAliases(aliases)
+
+    def RebuildGames(self, games: dict):
+        self.games = {}
+        for game_name in games:
+            self.AddGame(game_name)
+
+    def RebuildAliases(self, aliases: dict):
+        self.aliases     = {}
+        self.alias_games = {}
+        for alias, game_name in aliases.items():
+            self.SetAlias(alias, game_name)
+
+    # Names that normalize to the same key are kept in the order they were added, the first one wins
+    def AddGame(self, game_name: str):
+        names = self.games.setdefault(NormalizeName(game_name), [])
+        if game_name not in names:
+            names.append(game_name)
+
+    def RemoveGame(self, game_name: str):
+        key = NormalizeName(game_name)
+        names = self.games.get(key)
+        if names and game_name in names:
+            names.remove(game_name)
+            if not names:
+                del self.games[key]
+
+    # Points an alias at a game, or removes the alias if no game is given
+    def SetAlias(self, alias: str, game_name: str = None):
+        key = NormalizeName(alias)
+        if alias in self.alias_games:
+            del self.alias_games[alias]
+            self.aliases[key].remove(alias)
+            if not self.aliases[key]:
+                del self.aliases[key]
+
+        if game_name is not None:
+            self.alias_games[alias] = game_name
+            self.aliases.setdefault(key, []).append(alias)
+
+    # Returns the canonical game name of a game or alias name, or None if it's unknown
+    # Exact aliases are checked first, followed by normalized game names and then normalized aliases
+    def Resolve(self, name: str) -> str:
+        if name in self.alias_games:
+            return self.alias_games[name]
+
+        key = NormalizeName(name)
+        names = self.games.get(key)
+        if names:
+            return name if name in names else names[0]
+
+        aliases = self.aliases.get(key)
+        if aliases:
+            return self.alias_games[aliases[0]]
+
+        return None
+
+# Returns the escaped pattern of a filter rule, bounded by \b on the ends that are word characters
+def GetRulePattern(rule: str) -> str:
+    start = r"\b" if re.match(r"\w", rule[0]) else ""
+    end   = r"\b" if re.match(r"\w", rule[-1]) else ""
+    return f"{start}{re.escape(rule)}{end}"
+
+# Removes configured strings from activity names, ignoring case, and strips accents
+# Every rule is matched by a single compiled pattern and results are cached, since the same activities are seen over and over
+class NameFilter:
+    def __init__(self, rules: list = [], cache_size: int = filter_cache_size):
+        self.cache_size = cache_size
+        self.rules      = None
+        self.SetRules(rules)
+
+    # Compiles the rules into one pattern, longer rules first so they win over the rules they contain
+    # Rules only match whole words where they start or end with a word character, so "Demo" leaves "Pandemonium" alone
+    def SetRules(self, rules: list):
+        if rules == self.rules:
+            return
+
+        self.rules   = list(rules)
+        self.keys    = {rule.casefold(): rule for rule in self.rules}
+        self.hits    = {rule: 0 for rule in self.rules}
+        self.cache   = OrderedDict()
+        self.lookups = 0
+        self.misses  = 0
+
+        patterns = [GetRulePattern(rule) for rule in sorted(self.rules, key = len, reverse = True) if rule]
+        self.pattern = re.compile("|".join(patterns), re.IGNORECASE) if patterns else None
+
+    # Returns the filtered name and the rules that matched it
+    def Apply(self, original: str) -> tuple:
+        matched = []
+        filtered_name = original
+        if self.pattern:
+            def Replace(match):
+                matched.append(self.keys.get(match.group(0).casefold()))
+                return ""
+            filtered_name = self.pattern.sub(Replace, original)
+
+        return StripAccents(filtered_name).strip(), tuple(rule for rule in matched if rule is not None)
+
+    def __call__(self, original: str) -> str:
+        self.lookups += 1
+        entry = self.cache.get(original)
+        if entry is None:
+            self.misses += 1
+            entry = self.Apply(original)
+            self.cache[original] = entry
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last = False)
+        else:
+            self.cache.move_to_end(original)
+
+        # Counts every time a rule changes a name, not only the first time a name is filtered
+        for rule in entry[1]:
+            self.hits[rule] += 1
+
+        return entry[0]
@@ -0,0 +1,99 @@
+from .fileio import WriteAtomic
+from contextlib import contextmanager
+from collections import deque
+from datetime import datetime
+import functools
+import inspect
+import math
+import time
+
+# Returns the nearest-rank percentile of an already sorted list
+def GetPercentile(samples: list, percentile: float) -> float:
+    if not samples:
+        return 0
+    index = max(0, min(len(samples) - 1, math.ceil(percentile / 100 * len(samples)) - 1))
+    return samples[index]
+
+# Running statistics of a single named span, keeping a bounded window of recent latencies
+class SpanStats:
+    __slots__ = ('count', 'errors', 'total', 'samples')
+
+    def __init__(self, sample_size: int):
+        self.count   = 0
+        self.errors  = 0
+        self.total   = 0.0
+        self.samples = deque(maxlen = sample_size)
+
+class PerfRecorder:
+    def __init__(self, sample_size: int = 1024):
+        self.sample_size = sample_size
+        self.spans       = {}
+        self.started     = datetime.now()
+
+    # Records the duration in seconds of a single call
+    def Record(self, name: str, duration: float, error: bool = False):
+        stats = self.spans.get(name)
+        if stats is None:
+            stats = self.spans[name] = SpanStats(self.sample_size)
+
+        stats.count += 1
+        stats.total += duration
+        stats.samples.append(duration)
+        if error:
+            stats.errors += 1
+
+    # Times the enclosed block, counting raised exceptions as errors
+    @contextmanager
+    def Span(self, name: str):
+        start_time = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.Record(name, time.perf_counter() - start_time, error)
+
+    # Decorator that times every call of a function or coroutine function
+    def Timed(self, name: str = None):
+        def Decorator(func):
+            span_name = name or func.__name__
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def AsyncWrapper(*args, **kwargs):
+                    with self.Span(span_name):
+                        return await func(*args, **kwargs)
+                return AsyncWrapper
+
+            @functools.wraps(func)
+            def Wrapper(*args, **kwargs):
+                with self.Span(span_name):
+                    return func(*args, **kwargs)
+            return Wrapper
+
+        return Decorator
+
+    # Returns the count, errors and latency percentiles in milliseconds of every span
+    def GetStats(self) -> dict:
+        stats = {}
+        for name, span in sorted(self.spans.items()):
+            samples = sorted(span.samples)
+            stats[name] = {
+                'count':  span.count,
+                'errors': span.errors,
+                'mean':   round(span.total / span.count * 1000, 2),
+                'p50':    round(GetPercentile(samples, 50) * 1000, 2),
+                'p95':    round(GetPercentile(samples, 95) * 1000, 2),
+                'p99':    round(GetPercentile(samples, 99) * 1000, 2)
+            }
+        return stats
+
+    # Returns the statistics along with the time window they cover
+    def GetReport(self) -> dict:
+        return {'since': self.started, 'exported': datetime.now(), 'spans': self.GetStats()}
+
+    # Writes a report to the metrics file, meant to be run in a worker thread
+    def Export(self, file: str, report: dict):
+        WriteAtomic(file, report)
@@ -0,0 +1,80 @@
+# Reverse indexes of which members play or track which games
+class PlayerIndex:
+    def __init__(self):
+        self.game_members = {}
+        self.member_games = {}
+        self.removed      = set()
+
+    # Indexes every member from scratch
+    def Rebuild(self, members: dict):
+        self.game_members = {}
+        self.member_games = {}
+        self.removed      = set()
+        for member_name, member in members.items():
+            self.UpdateMember(member_name, member)
+
+    # Removed games stay out of the index until they're added again
+    def Add(self, member_name: str, game_name: str):
+        if game_name in self.removed:
+            return
+
+        self.member_games.setdefault(member_name, set()).add(game_name)
+        self.game_members.setdefault(game_name, set()).add(member_name)
+
+    def Remove(self, member_name: str, game_name: str):
+        games = self.member_games.get(member_name)
+        if games:
+            games.discard(game_name)
+            if not games:
+                del self.member_games[member_name]
+
+        players = self.game_members.get(game_name)
+        if players:
+            players.discard(member_name)
+            if not players:
+                del self.game_members[game_name]
+
+    # Indexes a removed game again for every member that still has it in their games, once the game is added again
+    def AddGame(self, game_name: str, members: dict):
+        if game_name not in self.removed:
+            return
+
+        self.removed.discard(game_name)
+        for member_name, member in members.items():
+            if game_name in member.get('games', {}):
+                self.Add(member_name, game_name)
+
+    # Drops a game from the index, leaving the games of the member records as they are
+    def RemoveGame(self, game_name: str):
+        self.removed.add(game_name)
+        for member_name in list(self.game_members.get(game_name, ())):
+            self.Remove(member_name, game_name)
+
+    # Re-indexes the games of a member, or drops the member if no record is given
+    def UpdateMember(self, member_name: str, member: dict = None):
+        old_games = self.member_games.get(member_name, set())
+        new_games = set(member.get('games', {})) if member else set()
+
+        for game_name in old_games - new_games:
+            self.Remove(member_name, game_name)
+        for game_name in new_games - old_games:
+            self.Add(member_name, game_name)
+
+    # Re-indexes a single game of a member, depending on whether it's still in their games
+    def UpdateMemberGame(self, member_name: str, game_name: str, member: dict = None):
+        if member and game_name in member.get('games', {}):
+            self.Add(member_name, game_name)
+        else:
+            self.Remove(member_name, game_name)
+
+    # Returns the names of the members who play or track a game
+    def GetPlayers(self, game_name: str) -> set:
+        return self.game_members.get(game_name, set())
+
+    # Returns the number of members who play or track a game
+    def GetPlayerCount(self, game_name: str) -> int:
+        return len(self.game_members.get(game_name, ()))
+
+    # Returns the names of the games a member plays or tracks
+    def GetGames(self, member_name: str) -> set:
+        return self.member_games.get(member_name, set())
@@ -0,0 +1,129 @@
+from collections.abc import MutableMapping
+
+# Version of the record layout, increased whenever a migration is added
+schema_version = 1
+
+# Fixed-layout record that still reads and writes like the dictionary it replaced
+# Fields that were never set are missing, just like absent keys
+class Record(MutableMapping):
+    __slots__ = ()
+    field_set = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.field_set = frozenset(cls.__slots__)
+
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            self[key] = value
+
+    # Builds a record from a dictionary, ignoring keys outside of the schema
+    @classmethod
+    def FromDict(cls, data: dict):
+        if isinstance(data, cls):
+            return data
+
+        record = cls.__new__(cls)
+        for key in cls.__slots__:
+            if key in data:
+                setattr(record, key, data[key])
+        return record
+
+    # Returns the record as a plain dictionary
+    def ToDict(self) -> dict:
+        return {key: getattr(self, key) for key in self}
+
+    def __getitem__(self, key: str):
+        if key in self.field_set:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: any):
+        if key not in self.field_set:
+            raise KeyError(f"{key} is not a field of {type(self).__name__}")
+        setattr(self, key, value)
+
+    def __delitem__(self, key: str):
+        if key in self.field_set:
+            try:
+                delattr(self, key)
+                return
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.field_set and hasattr(self, key)
+
+    def __iter__(self):
+        return (key for key in self.__slots__ if hasattr(self, key))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def get(self, key: str, default: any = None) -> any:
+        if key in self.field_set:
+            return getattr(self, key, default)
+        return default
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.ToDict()})"
+
+# A game and its role, history is kept as {date: {member_name: {'playtime', 'last_played'}}}
+class Game(Record):
+    __slots__ = ('id', 'name', 'summary', 'first_release_date', 'aggregated_rating', 'cover_url', 'role', 'added_datetime', 'history', 'rollup', 'last_archived', 'color')
+
+# A member's preference for a single game's role
+class MemberGame(Record):
+    __slots__ = ('tracked',)
+
+# A server member and the games they track
+class Member(Record):
+    __slots__ = ('name', 'display_name', 'created_at', 'joined_at', 'games', 'opt_out')
+
+    @classmethod
+    def FromDict(cls, data: dict):
+        record = super().FromDict(data)
+        record.Coerce()
+        return record
+
+    # Converts any plain game entries, such as those merged in by an update, to records
+    def Coerce(self):
+        games = self.get('games')
+        if games:
+            for game_name, details in games.items():
+                if not isinstance(details, MemberGame):
+                    games[game_name] = MemberGame.FromDict(details)
+
+# Fills in the entries that every record should have and drops the unused IGDB fields
+def MigrateV1(games: dict, members: dict):
+    for game in games.values():
+        game.setdefault('role', None)
+        game.pop('dlcs', None)
+
+    for member in members.values():
+        member.setdefault('games', {})
+        member.setdefault('opt_out', False)
+
+        # Removes legacy details from the member's games
+        for details in member['games'].values():
+            details.pop('name', None)
+            details.pop('last_played', None)
+            details.setdefault('tracked', True)
+
+# Migrations by the version they upgrade from
+migrations = [MigrateV1]
+
+# Upgrades raw games and members from an older schema version in place
+def MigrateRecords(games: dict, members: dict, version: int):
+    for migration in migrations[version:]:
+        migration(games, members)
+
+# Converts every raw entry of a collection to a record of the given type
+def ToRecords(collection: dict, record_type: type) -> dict:
+    for key, value in collection.items():
+        collection[key] = record_type.FromDict(value)
+    return collection
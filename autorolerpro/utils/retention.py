@@ -0,0 +1,97 @@
+from .fileio import Loads, Dumps
+from datetime import datetime, timedelta
+import os
+
+# Cold storage for raw history detail, appended as json lines and only read when a query reaches past the hot window
+class HistoryArchive:
+    def __init__(self, archive_file: str):
+        self.archive_file = archive_file
+        self.data         = None
+
+    # Returns true if the archive has been read into memory
+    def IsLoaded(self) -> bool:
+        return self.data is not None
+
+    # Reads the whole archive into memory: {game: {date: {member_name: details}}}
+    def Load(self) -> dict:
+        if self.data is None:
+            self.data = {}
+            if os.path.isfile(self.archive_file):
+                with open(self.archive_file, "rb") as fp:
+                    for line in fp:
+                        # Skips a partially written final line from an interrupted append
+                        try:
+                            record = Loads(line)
+                        except ValueError:
+                            continue
+
+                        self.data.setdefault(record['g'], {}).setdefault(record['d'], {}).update(record['v'])
+
+        return self.data
+
+    # Returns the archived history of a game, loading the archive on first use
+    def GetHistory(self, game_name: str) -> dict:
+        return self.Load().get(game_name, {})
+
+    # Appends the archived days of every game to the archive file, meant to be run in a worker thread
+    def Append(self, archived: dict):
+        with open(self.archive_file, "ab") as fp:
+            for game_name, days in archived.items():
+                for day, day_value in days.items():
+                    fp.write(Dumps({'g': game_name, 'd': day, 'v': day_value}) + b"\n")
+            fp.flush()
+            os.fsync(fp.fileno())
+
+    # Keeps an already loaded archive in sync with newly appended days
+    def Merge(self, archived: dict):
+        if self.data is not None:
+            for game_name, days in archived.items():
+                for day, day_value in days.items():
+                    self.data.setdefault(game_name, {}).setdefault(day, {}).update(day_value)
+
+# Returns the total playtime of a game's monthly rollups, optionally for a single member
+def GetRollupPlaytime(rollup: dict, member_name: str = None) -> float:
+    total = 0
+    for members in rollup.values():
+        if member_name is None:
+            total += sum(members.values())
+        else:
+            total += members.get(member_name, 0)
+    return total
+
+# Returns the days of every game's history that fall outside of the hot window: {game: {date: {member_name: details}}}
+def GetExpiredHistory(games: dict, hot_days: int) -> dict:
+    cutoff = (datetime.now() - timedelta(days = hot_days)).strftime('%Y-%m-%d')
+
+    expired = {}
+    for game_name, game in games.items():
+        if 'history' not in game:
+            continue
+
+        # Copies the expired entries so they can be archived from a worker thread
+        days = {day: {member_name: dict(details) for member_name, details in day_value.items()} for day, day_value in game['history'].items() if day <= cutoff}
+        if days:
+            expired[game_name] = days
+
+    return expired
+
+# Folds the expired days into the monthly per-member rollups of each game and drops them from the hot history
+def RollupHistory(games: dict, expired: dict):
+    for game_name, days in expired.items():
+        game = games.get(game_name)
+        if not game:
+            continue
+
+        if 'rollup' not in game:
+            game['rollup'] = {}
+
+        for day, day_value in days.items():
+            month = game['rollup'].setdefault(day[:7], {})
+            for member_name, details in day_value.items():
+                if 'playtime' in details:
+                    month[member_name] = round(month.get(member_name, 0) + details['playtime'], 2)
+
+            del game['history'][day]
+
+        # Remembers the most recent archived day for last played lookups once the hot history is empty
+        game['last_archived'] = max(max(days), game.get('last_archived', ""))
@@ -0,0 +1,147 @@
+from .retention import HistoryArchive
+from .history import GetCutoff, ToOrdinal
+from datetime import date
+
+# Windows in days that are kept as running totals, alongside the all-time totals
+rolling_windows = [7, 30, 90]
+
+# Totals below this are treated as expired, since repeated float additions and subtractions don't cancel exactly
+min_playtime = 0.005
+
+# Running playtime totals per game and per member for a few fixed windows and all-time
+# Sessions are added as they end and days are subtracted as they fall out of each window, so queries never scan the history
+class RollingPlaytime:
+    def __init__(self, archive: HistoryArchive = None, hot_days: int = None, windows: list = rolling_windows):
+        self.archive  = archive
+        self.hot_days = hot_days
+        self.windows  = windows
+        self.built    = False
+
+    # Returns true if the number of days can be answered without the history, None being all-time
+    # Windows without running totals are summed from the daily buckets, so they can't be longer than the longest window
+    def Supports(self, days: int = None) -> bool:
+        return days is None or days <= max(self.windows)
+
+    # Drops every total, forcing a rebuild on next use
+    def Invalidate(self):
+        self.built = False
+
+    # Adds up every game's history once, monthly rollups count towards all-time and archived days towards windows reaching past the hot history
+    def Build(self, games: dict):
+        self.totals        = {window: {} for window in self.windows + [None]}
+        self.member_totals = {window: {} for window in self.windows + [None]}
+        self.buckets       = {}
+        self.cutoffs       = {window: GetCutoff(window) for window in self.windows}
+        self.today         = date.today()
+
+        reaches_archive = self.archive and self.hot_days and max(self.windows) > self.hot_days
+        for game_name, game in games.items():
+            for day, day_value in game.get('history', {}).items():
+                ordinal = ToOrdinal(day)
+                for member_name, details in day_value.items():
+                    if 'playtime' in details:
+                        self.AddPlaytime(game_name, member_name, ordinal, details['playtime'], True)
+
+            for members in game.get('rollup', {}).values():
+                for member_name, playtime in members.items():
+                    self.Add(None, game_name, member_name, playtime)
+
+            # Archived days are already part of the rollups, so they only count towards the windows
+            if reaches_archive and 'last_archived' in game:
+                for day, day_value in self.archive.GetHistory(game_name).items():
+                    ordinal = ToOrdinal(day)
+                    if ordinal > self.cutoffs[max(self.windows)]:
+                        for member_name, details in day_value.items():
+                            if 'playtime' in details:
+                                self.AddPlaytime(game_name, member_name, ordinal, details['playtime'], True, False)
+
+        self.built = True
+
+    # Adds to the running total of a game and member in a window
+    def Add(self, window: int, game_name: str, member_name: str, hours: float):
+        totals = self.totals[window]
+        totals[game_name] = totals.get(game_name, 0) + hours
+
+        member_totals = self.member_totals[window].setdefault(member_name, {})
+        member_totals[game_name] = member_totals.get(game_name, 0) + hours
+
+    # Subtracts from the running total of a game and member in a window, dropping totals that reach zero
+    def Subtract(self, window: int, game_name: str, member_name: str, hours: float):
+        totals = self.totals[window]
+        total = totals.get(game_name, 0) - hours
+        if total < min_playtime:
+            totals.pop(game_name, None)
+        else:
+            totals[game_name] = total
+
+        member_totals = self.member_totals[window].get(member_name, {})
+        total = member_totals.get(game_name, 0) - hours
+        if total < min_playtime:
+            member_totals.pop(game_name, None)
+        else:
+            member_totals[game_name] = total
+
+    # Adds the playtime of a member on a given day to every window it falls within
+    def AddPlaytime(self, game_name: str, member_name: str, ordinal: int, hours: float, force: bool = False, all_time: bool = True):
+        if not self.built and not force:
+            return
+
+        if all_time:
+            self.Add(None, game_name, member_name, hours)
+
+        # Days are kept until they fall out of the longest window
+        if ordinal > self.cutoffs[max(self.windows)]:
+            bucket = self.buckets.setdefault(ordinal, {})
+            bucket[(game_name, member_name)] = bucket.get((game_name, member_name), 0) + hours
+
+        for window in self.windows:
+            if ordinal > self.cutoffs[window]:
+                self.Add(window, game_name, member_name, hours)
+
+    # Subtracts the days that fell out of each window since the last expiry, meant to be run after midnight
+    def Expire(self):
+        if not self.built or self.today == date.today():
+            return
+
+        for window in self.windows:
+            cutoff = GetCutoff(window)
+            for ordinal in range(self.cutoffs[window] + 1, cutoff + 1):
+                for (game_name, member_name), hours in self.buckets.get(ordinal, {}).items():
+                    self.Subtract(window, game_name, member_name, hours)
+            self.cutoffs[window] = cutoff
+
+        oldest = self.cutoffs[max(self.windows)]
+        self.buckets = {ordinal: bucket for ordinal, bucket in self.buckets.items() if ordinal > oldest}
+        self.today = date.today()
+
+    # Drops every total of a removed game
+    def Remove(self, game_name: str):
+        if not self.built:
+            return
+
+        for window in self.totals:
+            self.totals[window].pop(game_name, None)
+            for member_totals in self.member_totals[window].values():
+                member_totals.pop(game_name, None)
+
+        for bucket in self.buckets.values():
+            for key in [key for key in bucket if key[0] == game_name]:
+                del bucket[key]
+
+    # Returns the total playtime per game in a window, optionally for a single member
+    def GetPlaytime(self, days: int = None, member_name: str = None) -> dict:
+        self.Expire()
+        if days is None or days in self.totals:
+            if member_name is None:
+                return self.totals[days]
+            return self.member_totals[days].get(member_name, {})
+
+        # Sums the daily buckets within the window
+        cutoff = GetCutoff(days)
+        totals = {}
+        for ordinal, bucket in self.buckets.items():
+            if ordinal > cutoff:
+                for (game_name, bucket_member), hours in bucket.items():
+                    if member_name is None or bucket_member == member_name:
+                        totals[game_name] = totals.get(game_name, 0) + hours
+        return totals
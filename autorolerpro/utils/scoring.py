@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+import heapq
+
+# Number of days a game is protected from role eviction after being added
+grace_days = 1
+
+# Returns the number of days between two datetimes as a float
+def GetDays(start: datetime, end: datetime) -> float:
+    delta = end - start
+    return delta.days + delta.seconds/86400
+
+# Everything a game's eviction score is calculated from
+class ScoreInputs:
+    __slots__ = ('playtime', 'players', 'last_played', 'added', 'has_role')
+
+    def __init__(self, playtime: float = 0, players: int = 0, last_played: datetime = None, added: datetime = None, has_role: bool = False):
+        self.playtime    = playtime
+        self.players     = players
+        self.last_played = last_played
+        self.added       = added
+        self.has_role    = has_role
+
+# Keeps the inputs of every game's score up to date and a min-heap of the scores of games that could lose their role
+# Only games holding a role past their grace period are in the heap, games still in their grace period wait in a heap of their own
+# Heap entries are invalidated lazily by a per-game version, and since scores decay with time the heap is rescored periodically
+class ScoreIndex:
+    def __init__(self, rescore_seconds: int = 3600):
+        self.rescore_seconds = rescore_seconds
+        self.inputs          = {}
+        self.versions        = {}
+        self.heap            = []
+        self.waiting         = []
+        self.scored_at       = None
+        self.built           = False
+
+    # Returns the score of a game, lower scores are evicted first
+    def Score(self, inputs: ScoreInputs, now: datetime) -> float:
+        if inputs.last_played:
+            days = GetDays(inputs.last_played, now)
+        elif inputs.added:
+            days = GetDays(inputs.added, now)
+        else:
+            days = 0
+
+        # Guards against a game that was played or added this very moment
+        return (inputs.players + inputs.playtime)/max(days, 1/86400)
+
+    # Returns when a game can lose its role, or None if it can't, games without a role or an added datetime are never evicted
+    def GetEligible(self, inputs: ScoreInputs) -> datetime:
+        if not inputs.has_role or not inputs.added:
+            return None
+        return inputs.added + timedelta(days = grace_days)
+
+    # Invalidates the previous entries of a game and pushes a fresh one into the heap it belongs in, if any
+    def Push(self, game_name: str, now: datetime = None):
+        now = now or datetime.now()
+        version = self.versions.get(game_name, 0) + 1
+        self.versions[game_name] = version
+
+        inputs = self.inputs[game_name]
+        eligible = self.GetEligible(inputs)
+        if eligible is None:
+            return
+        elif eligible >= now:
+            heapq.heappush(self.waiting, (eligible, version, game_name))
+        else:
+            heapq.heappush(self.heap, (self.Score(inputs, now), version, game_name))
+
+        # Drops invalidated entries once they outnumber the valid ones
+        if len(self.heap) + len(self.waiting) > 2 * len(self.inputs) + 64:
+            self.Rescore(now)
+
+    # Rescores every game and rebuilds both heaps
+    def Rescore(self, now: datetime = None):
+        now = now or datetime.now()
+        self.heap    = []
+        self.waiting = []
+        for game_name, inputs in self.inputs.items():
+            eligible = self.GetEligible(inputs)
+            if eligible is None:
+                continue
+            elif eligible >= now:
+                self.waiting.append((eligible, self.versions.get(game_name, 0), game_name))
+            else:
+                self.heap.append((self.Score(inputs, now), self.versions.get(game_name, 0), game_name))
+
+        heapq.heapify(self.heap)
+        heapq.heapify(self.waiting)
+        self.scored_at = now
+
+    # Moves the games whose grace period ended into the heap
+    def Promote(self, now: datetime):
+        while self.waiting and self.waiting[0][0] < now:
+            _, version, game_name = heapq.heappop(self.waiting)
+            if self.versions.get(game_name, 0) == version and game_name in self.inputs:
+                heapq.heappush(self.heap, (self.Score(self.inputs[game_name], now), version, game_name))
+
+    # Replaces every input at once
+    def Build(self, inputs: dict):
+        self.inputs = inputs
+        self.versions = {}
+        self.Rescore()
+        self.built = True
+
+    # Drops every input, forcing a rebuild on next use
+    def Invalidate(self):
+        self.inputs = {}
+        self.versions = {}
+        self.heap = []
+        self.waiting = []
+        self.built = False
+
+    # Sets the inputs of a single game
+    def Set(self, game_name: str, inputs: ScoreInputs):
+        if self.built:
+            self.inputs[game_name] = inputs
+            self.Push(game_name)
+
+    # Versions are kept so entries from before a removal can't be mistaken for new ones
+    def Remove(self, game_name: str):
+        if self.built and game_name in self.inputs:
+            del self.inputs[game_name]
+
+    # Adds the playtime of a finished play session
+    def AddPlaytime(self, game_name: str, hours: float, day: datetime):
+        if self.built and game_name in self.inputs:
+            inputs = self.inputs[game_name]
+            inputs.playtime += hours
+            if not inputs.last_played or day > inputs.last_played:
+                inputs.last_played = day
+            self.Push(game_name)
+
+    # Marks the day a play session started
+    def SetLastPlayed(self, game_name: str, day: datetime):
+        if self.built and game_name in self.inputs:
+            inputs = self.inputs[game_name]
+            if not inputs.last_played or day > inputs.last_played:
+                inputs.last_played = day
+                self.Push(game_name)
+
+    def SetPlayers(self, game_name: str, players: int):
+        if self.built and game_name in self.inputs:
+            self.inputs[game_name].players = players
+            self.Push(game_name)
+
+    # Adds the game to the heap when it gets a role and drops it when it loses its role
+    def SetRole(self, game_name: str, has_role: bool):
+        if self.built and game_name in self.inputs and self.inputs[game_name].has_role != has_role:
+            self.inputs[game_name].has_role = has_role
+            self.Push(game_name)
+
+    def SetAdded(self, game_name: str, added: datetime):
+        if self.built and game_name in self.inputs:
+            self.inputs[game_name].added = added
+            self.Push(game_name)
+
+    # Returns up to count of the lowest scoring games with a role, skipping blacklisted and recently added games
+    def GetLowest(self, count: int = 1, black_list: list = []) -> list:
+        now = datetime.now()
+        if self.scored_at is None or (now - self.scored_at).total_seconds() > self.rescore_seconds:
+            self.Rescore(now)
+        else:
+            self.Promote(now)
+
+        lowest = []
+        valid  = []
+        while self.heap and len(lowest) < count:
+            entry = heapq.heappop(self.heap)
+            _, version, game_name = entry
+
+            # Discards entries that were replaced by a newer score
+            if self.versions.get(game_name, 0) != version or game_name not in self.inputs:
+                continue
+            valid.append(entry)
+
+            if game_name in black_list:
+                continue
+
+            lowest.append((game_name, self.Score(self.inputs[game_name], now)))
+
+        # Puts the still valid entries back for next time
+        for entry in valid:
+            heapq.heappush(self.heap, entry)
+
+        return lowest
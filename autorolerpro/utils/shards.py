@@ -0,0 +1,56 @@
+from .fileio import ReadJson, WriteAtomic
+import hashlib
+import os
+
+# Returns a filesystem safe, collision free shard filename for the key
+def GetShardName(key: str) -> str:
+    safe_name = "".join(c for c in key if c.isalnum() or c in " -_")[:48].strip()
+    return f"{safe_name}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]}.json"
+
+class ShardStore:
+    def __init__(self, directory: str):
+        self.directory  = directory
+        self.index_file = f"{directory}/index.json"
+        self.keys       = []
+
+    # Returns true if the shard directory has been initialized
+    def Exists(self) -> bool:
+        return os.path.isfile(self.index_file)
+
+    # Loads every shard, preserving the original order of the keys
+    def Load(self) -> dict:
+        self.keys = ReadJson(self.index_file)
+
+        data = {}
+        for key in self.keys:
+            shard_file = f"{self.directory}/{GetShardName(key)}"
+            if os.path.isfile(shard_file):
+                data[key] = ReadJson(shard_file)['value']
+
+        return data
+
+    # Writes only the shards of the changed keys, removing shards of deleted keys
+    def Save(self, records: dict, deleted: list, keys: list):
+        os.makedirs(self.directory, exist_ok = True)
+
+        for key, value in records.items():
+            WriteAtomic(f"{self.directory}/{GetShardName(key)}", {'key': key, 'value': value}, None)
+
+        for key in deleted:
+            shard_file = f"{self.directory}/{GetShardName(key)}"
+            if os.path.isfile(shard_file):
+                os.remove(shard_file)
+
+        # The index only needs to be rewritten when keys are added, removed or reordered
+        if keys != self.keys or not self.Exists():
+            WriteAtomic(self.index_file, keys, None)
+            self.keys = keys
+
+    # Writes every shard and removes shards that no longer belong to a key
+    def SaveAll(self, data: dict):
+        self.Save(data, [key for key in self.keys if key not in data], list(data.keys()))
+
+        shard_names = {GetShardName(key) for key in data}
+        for file in os.listdir(self.directory):
+            if file.endswith(".json") and file != "index.json" and file not in shard_names:
+                os.remove(f"{self.directory}/{file}")
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+# Limits requests to a steady rate, allowing short bursts of up to capacity requests
+class TokenBucket:
+    def __init__(self, rate: float = 4, capacity: float = 4):
+        self.rate     = rate
+        self.capacity = capacity
+        self.tokens   = capacity
+        self.updated  = time.monotonic()
+        self.lock     = asyncio.Lock()
+
+    # Waits until a token is available and takes it, requests are served in the order they arrived
+    async def Acquire(self):
+        async with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 1
+                self.updated = time.monotonic()
+
+            self.tokens -= 1
+
+    # Stops handing out tokens for a while, used when the server asks to slow down
+    def Drain(self):
+        self.tokens = min(self.tokens, 0)
+        self.updated = time.monotonic()
+
+# Shares one in-flight fetch between concurrent callers asking for the same key
+class SingleFlight:
+    def __init__(self):
+        self.flights = {}
+
+    # Returns the value of every item, only fetching the items whose key isn't already being fetched
+    # fetch receives a list of items and returns a dictionary of their values, items it leaves out get None
+    async def Run(self, items: list, fetch, key = None) -> dict:
+        keys = {item: key(item) if key else item for item in items}
+
+        owned   = {}
+        waiting = {}
+        for item, item_key in keys.items():
+            if item_key in owned or item_key in waiting:
+                continue
+            if item_key in self.flights:
+                waiting[item_key] = self.flights[item_key]
+            else:
+                owned[item_key] = item
+
+        # Registers a future for every owned key, so callers arriving later wait on it instead of fetching again
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for item_key in owned:
+            future = futures[item_key] = self.flights[item_key] = loop.create_future()
+
+            # Marks a failure as retrieved, since nobody might be waiting on it
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+        values = {}
+        try:
+            fetched = await fetch(list(owned.values())) if owned else {}
+            for item_key, item in owned.items():
+                values[item_key] = fetched.get(item)
+                futures[item_key].set_result(values[item_key])
+        except BaseException as error:
+            for future in futures.values():
+                if future.done():
+                    continue
+                if isinstance(error, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(error)
+            raise
+        finally:
+            for item_key, future in futures.items():
+                if self.flights.get(item_key) is future:
+                    del self.flights[item_key]
+
+        for item_key, future in waiting.items():
+            values[item_key] = await asyncio.shield(future)
+
+        return {item: values[item_key] for item, item_key in keys.items()}
@@ -0,0 +1,72 @@
+from .fileio import ReadJson, WriteAtomic
+import asyncio
+import math
+import time
+import os
+
+# Activity names that couldn't be resolved to a game, skipped until their entry expires
+# Each repeated miss multiplies how long the name is skipped for, and blacklisted names are skipped for good
+class UnresolvedNames:
+    def __init__(self, unresolved_file: str, hours: float = 24, backoff: float = 2, max_hours: float = 720):
+        self.unresolved_file = unresolved_file
+        self.hours           = hours
+        self.backoff         = backoff
+        self.max_hours       = max_hours
+        self.until           = {}
+        self.misses          = {}
+        self.changed         = False
+
+        if os.path.isfile(self.unresolved_file):
+            for name, entry in ReadJson(self.unresolved_file).items():
+                self.until[name]  = math.inf if entry['until'] is None else entry['until']
+                self.misses[name] = entry['misses']
+
+    # Returns true if the name failed to resolve recently or was blacklisted
+    def IsSkipped(self, name: str) -> bool:
+        return self.until.get(name, 0) > time.time()
+
+    # Records a failed lookup, backing off further with every repeated miss
+    def Miss(self, name: str):
+        misses = self.misses.get(name, 0) + 1
+        hours = min(self.hours * self.backoff ** (misses - 1), self.max_hours)
+
+        self.misses[name] = misses
+        if self.until.get(name) != math.inf:
+            self.until[name] = time.time() + hours * 3600
+        self.changed = True
+
+    # Skips the name for good
+    def Blacklist(self, name: str):
+        self.misses[name] = self.misses.get(name, 0) + 1
+        self.until[name]  = math.inf
+        self.changed = True
+
+    # Forgets the name, once it resolves or is assigned as an alias
+    def Clear(self, name: str):
+        if name in self.until:
+            del self.until[name]
+            del self.misses[name]
+            self.changed = True
+
+    # Returns the blacklisted names
+    def GetBlacklist(self) -> list:
+        return [name for name, until in self.until.items() if until == math.inf]
+
+    # Writes the entries to disk in a worker thread if they changed, dropping the ones that expired longer than the longest backoff ago
+    async def Save(self):
+        if not self.changed:
+            return
+
+        forget_before = time.time() - self.max_hours * 3600
+        for name in [name for name, until in self.until.items() if until < forget_before]:
+            del self.until[name]
+            del self.misses[name]
+
+        entries = {name: {'misses': self.misses[name], 'until': None if until == math.inf else until} for name, until in self.until.items()}
+        self.changed = False
+
+        try:
+            await asyncio.to_thread(WriteAtomic, self.unresolved_file, entries)
+        except BaseException:
+            self.changed = True
+            raise